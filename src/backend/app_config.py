@@ -78,7 +78,9 @@ class AppConfig:
                     "user_data":"user_data"
                 },
                 "ingestion": {
-                    "context_window_equations": 30
+                    "context_window_equations": 30,
+                    "max_workers": 8,
+                    "checkpoint_every": 10
                 }
             }
             print(f"[Config] Warning: {CONFIG_PATH} not found. Using defaults.")
@@ -1,8 +1,13 @@
 import json
 import uuid
+from types import MappingProxyType
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
 
+def _plain(mapping):
+    # Read-only views (shared by cloned instances) are not JSON serializable
+    return dict(mapping) if isinstance(mapping, MappingProxyType) else mapping
+
 @dataclass
 class BGNode:
     name: str
@@ -24,12 +29,12 @@ class BGNode:
             "id": self.id,
             "name": self.name,
             "type": self.type,
-            "ports": self.ports,
+            "ports": _plain(self.ports),
             "variables": self.variables,
             "constitutive_laws": self.constitutive_laws,
             "system_properties": self.system_properties,
             "parameters": self.parameters, # Keep as dict for internal state
-            "metadata": self.metadata      # Keep as dict for internal state
+            "metadata": _plain(self.metadata) # Keep as dict for internal state
         }
 
     @staticmethod
@@ -3,6 +3,7 @@ import re
 import ast
 from typing import List, Dict, Any, Set, Tuple, Optional
 from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 
 # Imported RateLimiter for compatibility, though explicit waiting is removed
@@ -12,13 +13,33 @@ from library_builder import convert_cellml_to_bg_ast
 from composition_engine import CompositionEngine
 from bg_ast import BondGraphModel, BGNode 
 from app_config import config
+import fast_json
 from agent_types import AgentResult, BiologicalSpec, ComponentStatus, ParameterEvidence
 from prompt_manager import PromptManager
 
 REGISTRY_FILE = config.get("paths", "registry_file", "data/library_registry.json")
 
+# Precompiled patterns for LLM output parsing and Mermaid sanitization
+_FENCED = re.compile(r"```\w*(.*?)```", re.DOTALL)
+_COMMENT = re.compile(r"^\s*//.*$", re.MULTILINE)
+_SUBGRAPH_LINE = re.compile(r'subgraph\s+([a-zA-Z0-9_ ]+?\(.+?\))(\s*\[.*\])?')
+_SUBGRAPH_ID = re.compile(r'subgraph\s+([a-zA-Z0-9_ ]+?\(.+?\))(?=\s|$|\[)')
+_NON_IDENT = re.compile(r'[^a-zA-Z0-9_]')
+_CALL_LIKE_NODE = re.compile(r'([A-Za-z0-9_]+)\(([^)]+)\)')
+
 # --- Helper Functions ---
 
+def _parse_json_candidate(candidate: str):
+    """
+    Parses a JSON candidate as-is, stripping `//` comment lines only if that fails.
+    A comment line can't sit inside a JSON string, so a clean parse never needed stripping.
+    """
+    try:
+        return fast_json.loads(candidate)
+    except fast_json.JSONDecodeError:
+        if "//" not in candidate: raise
+        return fast_json.loads(_COMMENT.sub("", candidate))
+
 def robust_extract_json(text: str) -> Optional[Dict]:
     """
     Robust extraction logic to find the LAST valid JSON block in the text.
@@ -36,24 +57,19 @@ def robust_extract_json(text: str) -> Optional[Dict]:
     except:
         pass
 
-    # 1. Regex Match for Markdown Code Blocks
-    matches = re.findall(r"```\w*(.*?)```", text, re.DOTALL)
-    
-    candidates = []
-    if matches:
-        candidates = matches
-    else:
+    # 1. Markdown code blocks: record their spans and only slice the ones we try
+    spans = [m.span(1) for m in _FENCED.finditer(text)]
+    if not spans:
         # Fallback: Find outermost braces
         s = text.find('{')
         e = text.rfind('}') + 1
         if s != -1 and e != -1:
-            candidates.append(text[s:e])
+            spans.append((s, e))
 
     # Iterate REVERSE to find the last valid, non-template JSON block
-    for match in reversed(candidates):
-        clean_text = re.sub(r"^\s*//.*$", "", match, flags=re.MULTILINE)
+    for start, end in reversed(spans):
         try:
-            data = json.loads(clean_text.strip())
+            data = _parse_json_candidate(text[start:end])
             
             # --- HEURISTIC 1: Check for Python Code Template ---
             if "python_code" in data:
@@ -212,10 +228,10 @@ You may use the following components in your model. Refer to them by their 'ID'.
             if stripped.startswith('subgraph '):
                 # Check if there's a parenthesis in the ID part (before any bracket)
                 # Regex matches: subgraph [spaces] (ID with spaces/parens) [optional brackets]
-                match = re.match(r'subgraph\s+([a-zA-Z0-9_ ]+?\(.+?\))(\s*\[.*\])?', stripped)
+                match = _SUBGRAPH_LINE.match(stripped)
                 if match:
                     raw_id = match.group(1).strip()
-                    safe_id = re.sub(r'[^a-zA-Z0-9_]', '_', raw_id).strip('_')
+                    safe_id = _NON_IDENT.sub('_', raw_id).strip('_')
                     
                     # If user already provided a label [..], use it, otherwise make one
                     label_part = match.group(2) if match.group(2) else f' ["{raw_id}"]'
@@ -238,7 +254,7 @@ You may use the following components in your model. Refer to them by their 'ID'.
                 return f'{node_id}("{content}")'
             return match.group(0)
 
-        code = re.sub(r'([A-Za-z0-9_]+)\(([^)]+)\)', quote_if_needed, code)
+        code = _CALL_LIKE_NODE.sub(quote_if_needed, code)
         
         return code
 
@@ -282,28 +298,12 @@ class RetrievalGenerationAgent:
             if comp_def.get('library_id'): found_mechanisms.append(comp_def)
             else: missing_mechanisms.append(comp_def)
 
-        for comp_def in found_mechanisms:
-            lib_id = comp_def.get('library_id')
-            instance_id = comp_def.get('id', f"{lib_id}_inst")
-
-            if lib_id in self.registry:
-                entry = self.registry[lib_id]
-                try:
-                    raw_path = entry.get('filepath', '')
-                    full_path = self._resolve_filepath(raw_path)
-                    if not os.path.exists(full_path) and raw_path.startswith("data/"):
-                         full_path_alt = os.path.join(self.data_dir, raw_path)
-                         if os.path.exists(full_path_alt): full_path = full_path_alt
-                    
-                    ast_model = convert_cellml_to_bg_ast(full_path, lib_id)
-                    self._inject_semantics_into_ast(ast_model, entry)
-                    ast_model.instance_id_hint = instance_id 
-                    loaded.append(ast_model)
-                    status_list.append(ComponentStatus(instance_id, "Found", lib_id, f"Loaded from {os.path.basename(full_path)}"))
-                except Exception as e:
-                    status_list.append(ComponentStatus(instance_id, "Error", lib_id, str(e)))
-            else:
-                status_list.append(ComponentStatus(instance_id, "Missing", lib_id, "Not in registry"))
+        # Library components are independent file loads/parses: fetch them concurrently, keeping spec order
+        if found_mechanisms:
+            with ThreadPoolExecutor(max_workers=min(8, len(found_mechanisms))) as pool:
+                for ast_model, status in pool.map(self._load_library_component, found_mechanisms):
+                    if ast_model is not None: loaded.append(ast_model)
+                    status_list.append(status)
 
         synthesis_thoughts = ""
         if missing_mechanisms:
@@ -326,6 +326,28 @@ class RetrievalGenerationAgent:
         report = f"# Retrieval Report\nLoaded {len(loaded)} components."
         return AgentResult(True, loaded, report, thoughts=synthesis_thoughts)
 
+    def _load_library_component(self, comp_def: Dict) -> Tuple[Optional[BondGraphModel], ComponentStatus]:
+        lib_id = comp_def.get('library_id')
+        instance_id = comp_def.get('id', f"{lib_id}_inst")
+
+        if lib_id not in self.registry:
+            return None, ComponentStatus(instance_id, "Missing", lib_id, "Not in registry")
+
+        entry = self.registry[lib_id]
+        try:
+            raw_path = entry.get('filepath', '')
+            full_path = self._resolve_filepath(raw_path)
+            if not os.path.exists(full_path) and raw_path.startswith("data/"):
+                 full_path_alt = os.path.join(self.data_dir, raw_path)
+                 if os.path.exists(full_path_alt): full_path = full_path_alt
+            
+            ast_model = convert_cellml_to_bg_ast(full_path, lib_id)
+            self._inject_semantics_into_ast(ast_model, entry)
+            ast_model.instance_id_hint = instance_id 
+            return ast_model, ComponentStatus(instance_id, "Found", lib_id, f"Loaded from {os.path.basename(full_path)}")
+        except Exception as e:
+            return None, ComponentStatus(instance_id, "Error", lib_id, str(e))
+
     def _inject_semantics_into_ast(self, ast_model: BondGraphModel, registry_entry: Dict):
         if not ast_model.nodes: return
         target_node = list(ast_model.nodes.values())[0]
@@ -423,6 +445,8 @@ class ModelCompositionAgent:
             
         full_context = "\n".join(component_context)
         spec_dict = spec.__dict__ if hasattr(spec, '__dict__') else spec
+        # Both phases take the plain spec dict: only the draft prompt serializes intent_summary,
+        # so the two prompts have no serialized fragment to share
 
         # 2. PHASE 1: Draft Synthesis (Composition)
         # Use new PromptManager signature
@@ -483,11 +507,11 @@ class ModelCompositionAgent:
                 id_part = match.group(1)
                 # Check if ID has parens
                 if '(' in id_part:
-                     safe_id = re.sub(r'[^a-zA-Z0-9_]', '_', id_part).strip('_')
+                     safe_id = _NON_IDENT.sub('_', id_part).strip('_')
                      return f'subgraph {safe_id} ["{id_part}"]'
                 return full_line
 
-            mermaid_code = re.sub(r'subgraph\s+([a-zA-Z0-9_ ]+?\(.+?\))(?=\s|$|\[)', fix_subgraph_ids, mermaid_code)
+            mermaid_code = _SUBGRAPH_ID.sub(fix_subgraph_ids, mermaid_code)
 
         except Exception as e:
             return AgentResult(False, None, f"Composer Execution Error: {e}")
@@ -637,7 +661,7 @@ class AnalystReportingAgent:
              except Exception as e:
                  print(f"   [Analyst] Warning: Could not enable Google Search: {e}")
 
-    def execute(self, user_request: str, spec: Dict, code: str, curator_data: Dict) -> AgentResult:
+    def execute(self, user_request: str, spec: Dict, code: str, curator_data: Dict, on_chunk=None) -> AgentResult:
         print(f"   [Analyst] Generating Critical Report...")
         
         # Safe fallback for missing data
@@ -649,7 +673,7 @@ class AnalystReportingAgent:
         sys_inst, user_msg = PromptManager.get_analyst_report_prompts(user_request, spec, code, curator_data)
         
         try:
-            response = self.llm.generate_content(user_msg, system_instruction=sys_inst)
+            response = self.llm.generate_content(user_msg, system_instruction=sys_inst, on_chunk=on_chunk)
             report_markdown = response.text
             return AgentResult(True, report_markdown, report_markdown, thoughts=getattr(response, 'thoughts', report_markdown))
         except Exception as e:
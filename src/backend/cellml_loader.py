@@ -1,6 +1,8 @@
 import os
+import sys
 import uuid
 import re
+import math
 from lxml import etree
 from typing import Dict, List, Any, Tuple
 import numpy as np # Added for safety in linearization check
@@ -8,17 +10,31 @@ import numpy as np # Added for safety in linearization check
 MATHML_NS = "http://www.w3.org/1998/Math/MathML"
 XLINK_NS = "http://www.w3.org/1999/xlink"
 
+# n-ary operators whose nested applications can be merged into one chain
+_ASSOCIATIVE_OPS = {'plus': ' + ', 'times': ' * ', 'and': ' and ', 'or': ' or '}
+
+_IDENTIFIER_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+
 class CellMLLoader:
     """
     A robust CellML parser (supports 1.0 and 1.1).
     Returns structured equation data (LHS, RHS, Type) to avoid regex parsing later.
     """
     
-    def __init__(self):
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
         self.components = {} 
         self.connections = [] 
         self.parsed_files = set()
         self.cellml_ns = "http://www.cellml.org/cellml/1.1#" 
+        # Shared across files (parsing is serial). We never use xml:id lookups,
+        # whitespace-only text or comments, so skip building them.
+        self._parser = etree.XMLParser(
+            collect_ids=False,
+            remove_blank_text=True,
+            remove_comments=True,
+            huge_tree=True
+        )
 
     def parse_file(self, filepath: str):
         abs_path = os.path.abspath(filepath)
@@ -29,7 +45,7 @@ class CellMLLoader:
         }
 
     def _parse_recursive(self, filepath: str):
-        print(f"[Cellml loader] parsing {filepath}")
+        if self.verbose: print(f"[Cellml loader] parsing {filepath}")
         if filepath in self.parsed_files: return
         self.parsed_files.add(filepath)
 
@@ -38,7 +54,7 @@ class CellMLLoader:
             return
 
         try:
-            tree = etree.parse(filepath)
+            tree = etree.parse(filepath, self._parser)
             root = tree.getroot()
             if 'http://www.cellml.org/cellml/1.0#' in root.tag:
                 self.cellml_ns = "http://www.cellml.org/cellml/1.0#"
@@ -108,41 +124,44 @@ class CellMLLoader:
             if not isinstance(child.tag, str): continue
             if child.tag.endswith('apply'):
                 try:
-                    op_tag = child[0].tag.split('}')[-1]
+                    # Materialize children once; indexing an lxml element walks its child list
+                    kids = list(child)
+                    op_tag = kids[0].tag.split('}')[-1]
                     
                     # 1. Differential Equation: <eq> <diff> <bvar>... </diff> <rhs>... </eq>
-                    if op_tag == 'eq' and len(child) > 1:
-                        lhs_elem = child[1]
+                    if op_tag == 'eq' and len(kids) > 1:
+                        lhs_elem = kids[1]
+                        lhs_kids = list(lhs_elem)
                         
                         # Check if LHS is a diff
-                        if len(lhs_elem) > 0 and lhs_elem.tag.endswith('apply'):
-                            lhs_op = lhs_elem[0].tag.split('}')[-1]
+                        if len(lhs_kids) > 0 and lhs_elem.tag.endswith('apply'):
+                            lhs_op = lhs_kids[0].tag.split('}')[-1]
                             if lhs_op == 'diff':
                                 # ODE Found!
                                 # Structure: apply(diff, bvar, target_var)
                                 # target_var is usually the 2nd argument (child index 2)
-                                if len(lhs_elem) >= 3:
-                                    target_var = self._linearize_mathml(lhs_elem[2])
-                                    rhs = self._linearize_mathml(child[2], is_root=True)
+                                if len(lhs_kids) >= 3:
+                                    target_var = self._linearize_mathml(lhs_kids[2])
+                                    rhs = self._linearize_mathml(kids[2], is_root=True)
                                     
                                     if target_var and rhs:
                                         storage_list.append({
                                             'type': 'ode',
-                                            'lhs': target_var,
+                                            'lhs': sys.intern(target_var),
                                             'rhs': rhs
                                         })
                                     continue
 
                     # 2. Algebraic Equation: <eq> <ci>lhs</ci> <rhs>... </eq>
                     if op_tag == 'eq':
-                        lhs_str = self._linearize_mathml(child[1])
-                        rhs_str = self._linearize_mathml(child[2], is_root=True)
+                        lhs_str = self._linearize_mathml(kids[1])
+                        rhs_str = self._linearize_mathml(kids[2], is_root=True)
                         
                         # Safety check: ensure LHS is a valid variable name
-                        if lhs_str and rhs_str and re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', lhs_str):
+                        if lhs_str and rhs_str and _IDENTIFIER_RE.match(lhs_str):
                             storage_list.append({
                                 'type': 'algebraic',
-                                'lhs': lhs_str,
+                                'lhs': sys.intern(lhs_str),
                                 'rhs': rhs_str
                             })
 
@@ -154,7 +173,8 @@ class CellMLLoader:
         if not isinstance(element.tag, str): return ""
         tag = element.tag.split('}')[-1]
         
-        if tag == 'ci': return element.text.strip() if element.text else ""
+        # Identifiers recur across every component; intern them so equations share one string per name
+        if tag == 'ci': return sys.intern(element.text.strip()) if element.text else ""
         if tag == 'cn': return element.text.strip() if element.text else "0"
         if tag == 'true': return "True"
         if tag == 'false': return "False"
@@ -166,19 +186,23 @@ class CellMLLoader:
             children = [c for c in element if isinstance(c.tag, str)]
             if not children: return ""
             op_tag = children[0].tag.split('}')[-1]
-            args = [self._linearize_mathml(c, is_root=False) for c in children[1:]]
+            if op_tag in _ASSOCIATIVE_OPS:
+                # Flatten (((a + b) + c) + d) into a single (a + b + c + d) chain
+                args = self._collect_associative_args(op_tag, children[1:])
+            else:
+                args = [self._linearize_mathml(c, is_root=False) for c in children[1:]]
             args = [a for a in args if a] # Filter empty args
+
+            folded = self._fold_constants(op_tag, args)
+            if folded is not None: return folded
             
             # Operators
             if op_tag == 'eq': return f"{args[0]} = {args[1]}" if is_root else f"{args[0]} == {args[1]}"
-            if op_tag == 'plus': return f"({' + '.join(args)})"
             if op_tag == 'minus': return f"({args[0]} - {args[1]})" if len(args) > 1 else f"-{args[0]}"
-            if op_tag == 'times': return f"({' * '.join(args)})"
             if op_tag == 'divide': return f"({args[0]} / {args[1]})"
+            if op_tag in _ASSOCIATIVE_OPS: return f"({_ASSOCIATIVE_OPS[op_tag].join(args)})"
             
             # Logic
-            if op_tag == 'and': return f"({' and '.join(args)})"
-            if op_tag == 'or': return f"({' or '.join(args)})"
             if op_tag == 'xor': return f"({' != '.join(args)})"
             if op_tag == 'not': return f"(not {args[0]})"
             if op_tag == 'lt': return f"({args[0]} < {args[1]})"
@@ -219,4 +243,44 @@ class CellMLLoader:
                 res = f"({val} if {cond} else {res})"
             return res
 
-        return ""
\ No newline at end of file
+        return ""
+
+    def _collect_associative_args(self, op_tag, operands):
+        """
+        Linearizes the operands of an associative operator, pulling up the
+        arguments of nested applications of the same operator.
+        """
+        flat_args = []
+        for c in operands:
+            if c.tag.split('}')[-1] == 'apply':
+                sub = [s for s in c if isinstance(s.tag, str)]
+                if sub and sub[0].tag.split('}')[-1] == op_tag:
+                    flat_args.extend(self._collect_associative_args(op_tag, sub[1:]))
+                    continue
+            flat_args.append(self._linearize_mathml(c, is_root=False))
+        return flat_args
+
+    def _fold_constants(self, op_tag, args):
+        """
+        Evaluates arithmetic on purely numeric arguments at parse time.
+        Returns None if the expression cannot be folded.
+        """
+        if op_tag not in ('plus', 'minus', 'times', 'divide') or not args:
+            return None
+        try:
+            values = [float(a) for a in args]
+        except ValueError:
+            return None
+        if not all(math.isfinite(v) for v in values): return None
+
+        if op_tag == 'plus': result = sum(values)
+        elif op_tag == 'times': result = math.prod(values)
+        elif op_tag == 'minus':
+            if len(values) > 2: return None
+            result = values[0] - values[1] if len(values) == 2 else -values[0]
+        else:
+            if len(values) != 2 or values[1] == 0: return None
+            result = values[0] / values[1]
+
+        if not math.isfinite(result): return None
+        return repr(result) if result >= 0 else f"({result!r})"
\ No newline at end of file
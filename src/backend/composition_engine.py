@@ -1,33 +1,56 @@
+import sys
 import uuid
 import json
 import re
+from types import MappingProxyType
 from typing import List, Dict, Any, Tuple
 from bg_ast import BondGraphModel, BGNode, BGBond
 
+# Name prefixes used by the Search 2 flux heuristic
+_FLUX_PREFIXES = frozenset({'I_', 'i_', 'v_', 'J_'})
+_ELEC_PREFIXES = frozenset({'I', 'i'})
+
 class CompositionEngine:
     """
     Stitches Bond Graph ASTs together using SEMANTIC ONTOLOGY MATCHING.
     v4.3: Deep Variable Search + v4.0 Schema Support.
     """
-    def __init__(self):
+    def __init__(self, verbose: bool = False):
         self.unified_model = BondGraphModel(name="Unified_Cell_Model", protein_id="System")
         self.reservoirs: List[Dict] = []
         self.component_instances: Dict[str, BGNode] = {}
         self.log_buffer: List[str] = []
+        self.verbose = verbose
+        self._flushed = 0 # Number of log_buffer lines already written to stdout
+
+        # Flat per-node indices (keyed by cloned node id) built once in add_component,
+        # so the port searches avoid re-walking node.metadata per port.
+        self._lhs_by_node: Dict[str, frozenset] = {}
+        self._fluxes_by_node: Dict[str, List[str]] = {}
+        self._ports_by_node: Dict[str, Dict] = {}
 
     def log(self, message: str):
-        """Captures logs for frontend display and prints them to stdout."""
+        """Captures logs for frontend display. Prints immediately only in verbose mode."""
         self.log_buffer.append(message)
-        print(message)
+        if self.verbose:
+            self.flush_logs()
+
+    def flush_logs(self):
+        """Writes all not-yet-printed log lines to stdout in a single call."""
+        pending = self.log_buffer[self._flushed:]
+        if pending:
+            sys.stdout.write("\n".join(pending) + "\n")
+            self._flushed = len(self.log_buffer)
 
     def create_scaffold(self, scaffold_defs: List[Dict]):
         self.log(f"   [Composition] Building Ontology Scaffold...")
         for domain in scaffold_defs:
             dom_id = domain.get('id', f"Scaffold_{uuid.uuid4().hex[:8]}")
             
+            # Canonicalize the LLM's "null" string to None here, so matching never has to check for it
             semantics = {
                 "physics_id": domain.get('physics_id'),
-                "entity_id": domain.get('entity_id'),
+                "entity_id": None if domain.get('entity_id') == "null" else domain.get('entity_id'),
                 "location_id": domain.get('location_id'),
                 "entity_label": domain.get('entity_label', 'Unknown'),
                 "location_label": domain.get('location_label', 'Unknown')
@@ -60,12 +83,14 @@ class CompositionEngine:
         
         for node in component_model.nodes.values():
             new_name = f"{instance_id}_{node.name}"
+            # Instances share the library node's metadata/ports through read-only views;
+            # the engine never writes to them
             new_node = BGNode(
                 name=new_name,
                 type=node.type,
                 parameters=node.parameters,
-                metadata=node.metadata,
-                ports=node.ports,
+                metadata=MappingProxyType(node.metadata),
+                ports=MappingProxyType(node.ports),
                 variables=node.variables,
                 constitutive_laws=node.constitutive_laws,
                 system_properties=node.system_properties
@@ -74,6 +99,15 @@ class CompositionEngine:
             id_map[node.id] = new_node.id
             instance_nodes.append(new_node)
 
+            eqs = node.metadata.get('structured_equations', [])
+            self._lhs_by_node[new_node.id] = frozenset(eq['lhs'] for eq in eqs)
+            # Computed (non-ODE) variables that look like fluxes
+            self._fluxes_by_node[new_node.id] = [
+                eq['lhs'] for eq in eqs
+                if eq.get('type') != 'ode' and eq['lhs'][:2] in _FLUX_PREFIXES
+            ]
+            self._ports_by_node[new_node.id] = node.ports
+
         # 2. Clone Internal Bonds
         for bond in component_model.bonds:
             if bond.source_id in id_map and bond.target_id in id_map:
@@ -90,7 +124,7 @@ class CompositionEngine:
         # Note: This might NOT be the node that calculates the variables (Compute Node).
         port_def_node = None
         for node in instance_nodes:
-            if node.ports:
+            if self._ports_by_node[node.id]:
                 port_def_node = node
                 break
 
@@ -98,7 +132,7 @@ class CompositionEngine:
             self.log(f"      [Warning] No ports found on {instance_id}")
             return
 
-        for port_key, port_def in port_def_node.ports.items():
+        for port_key, port_def in self._ports_by_node[port_def_node.id].items():
             if not isinstance(port_def, dict): continue
 
             # A. Resolve Port Semantics & Variable Name (v4.0 Schema Support)
@@ -119,40 +153,29 @@ class CompositionEngine:
             actual_var_name = logical_flow_var
             found_computation = False
 
-            # Helper: Check if node computes variable
-            def computes_var(n: BGNode, v_name: str) -> bool:
-                if not v_name: return False
-                # Check structured equations LHS
-                for eq in n.metadata.get('structured_equations', []):
-                    if eq['lhs'] == v_name: return True
-                return False
-
             # Search 1: Exact Name Match across all nodes in instance
-            for n in instance_nodes:
-                if computes_var(n, logical_flow_var):
-                    actual_source_node = n
-                    actual_var_name = logical_flow_var
-                    found_computation = True
-                    break
+            if logical_flow_var:
+                for n in instance_nodes:
+                    if logical_flow_var in self._lhs_by_node[n.id]:
+                        actual_source_node = n
+                        actual_var_name = logical_flow_var
+                        found_computation = True
+                        break
             
             # Search 2: Heuristic Match (If LLM hallucinated a variable name like 'I_mem_total')
             if not found_computation:
                 self.log(f"      [Heuristic] '{logical_flow_var}' not found. Searching for candidate fluxes in {instance_id}...")
                 candidates = []
                 for n in instance_nodes:
-                    # Look for computed variables that look like fluxes
-                    computed_vars = [eq['lhs'] for eq in n.metadata.get('structured_equations', []) if eq.get('type') != 'ode']
-                    for cv in computed_vars:
-                        # Current/Flux Heuristics
-                        is_flux_name = cv.startswith('I_') or cv.startswith('i_') or cv.startswith('v_') or cv.startswith('J_')
-                        if is_flux_name:
-                             candidates.append((n, cv))
+                    # Computed variables that look like fluxes (Current/Flux Heuristics)
+                    for cv in self._fluxes_by_node[n.id]:
+                        candidates.append((n, cv))
                 
                 # Filter candidates based on Port Type
                 if candidates:
                     # If Electrical, prefer I_ or i_
                     if 'voltage' in port_key.lower() or 'electrical' in port_key.lower() or 'membrane' in port_key.lower():
-                        elec_cands = [c for c in candidates if c[1].startswith('I') or c[1].startswith('i')]
+                        elec_cands = [c for c in candidates if c[1][:1] in _ELEC_PREFIXES]
                         if elec_cands:
                             actual_source_node, actual_var_name = elec_cands[0]
                             found_computation = True
@@ -206,18 +229,18 @@ class CompositionEngine:
         if not p_phys: return None # Strict Mode: No physics ID = No strict match
 
         if p_entity == "null": p_entity = None
+        is_electrical = (p_phys == "OPB:00592")
         
+        # Reservoir semantics are canonicalized ("null" -> None) in create_scaffold
         for res in self.reservoirs:
             r_sem = res['semantics']
             r_phys = r_sem.get('physics_id')
             r_entity = r_sem.get('entity_id')
             r_loc = r_sem.get('location_id')
-            if r_entity == "null": r_entity = None
 
-            if p_phys and r_phys and p_phys != r_phys: continue
+            if r_phys and p_phys != r_phys: continue
             if p_loc and r_loc and p_loc != r_loc: continue
             
-            is_electrical = (p_phys == "OPB:00592")
             if not is_electrical:
                 if p_entity != r_entity: continue
             else:
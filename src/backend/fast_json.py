@@ -0,0 +1,30 @@
+"""
+JSON helpers backed by orjson when it is installed, with a stdlib fallback.
+Both directions work on bytes so callers can read/write files in binary mode
+with a single call.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Raised by loads() on malformed input (orjson's error subclasses the stdlib one)
+JSONDecodeError = json.JSONDecodeError
+
+def loads(data):
+    """Parses JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj, indent: bool = False, sort_keys: bool = False, default=None) -> bytes:
+    """Serializes to UTF-8 bytes. `indent` uses two spaces, matching json.dump(indent=2)."""
+    if orjson is not None:
+        # NON_STR_KEYS: int/float/bool/None keys become strings, as the json module does
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent: option |= orjson.OPT_INDENT_2
+        if sort_keys: option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys, default=default).encode('utf-8')
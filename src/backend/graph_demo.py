@@ -1,5 +1,6 @@
 import uuid
 import json
+import asyncio
 import re
 from pprint import pprint
 import sys
@@ -12,32 +13,32 @@ from graph_state import AgentState
 
 def print_markdown(text: str):
     """Helper to print markdown with visual separation and diagram detection"""
-    lines = text.split('\n')
-    print("\n" + "="*80)
+    out = ["", "="*80]
     in_mermaid = False
     
-    for line in lines:
+    for line in text.split('\n'):
         if "```mermaid" in line:
             in_mermaid = True
-            print("\n  [MERMAID DIAGRAM DETECTED - RENDERED IN UI]\n")
-            print("  -------------------------------------------")
-            print("  |   (Graph Topology Visualized Here)      |")
-            print("  -------------------------------------------")
-            continue
-        if "```" in line and in_mermaid:
-            in_mermaid = False
+            out.append("\n  [MERMAID DIAGRAM DETECTED - RENDERED IN UI]\n")
+            out.append("  -------------------------------------------")
+            out.append("  |   (Graph Topology Visualized Here)      |")
+            out.append("  -------------------------------------------")
             continue
         if in_mermaid:
-            # Skip printing raw mermaid code in CLI to reduce noise, 
-            # or uncomment to see raw code
-            # print(f"  | {line}") 
+            # Skip raw mermaid code in CLI to reduce noise, until the closing fence
+            if "```" in line:
+                in_mermaid = False
             continue
             
         # Simple indentation for clean reading
-        print(f"  {line}")
-    print("="*80 + "\n")
+        out.append(f"  {line}")
+    out.append("="*80 + "\n")
+
+    # One write instead of a print() per line
+    sys.stdout.write('\n'.join(out))
+    sys.stdout.write('\n')
 
-def main():
+async def main():
     print("=== Initializing LangGraph Semantic Architect ===")
     
     # 1. Setup Graph and Config
@@ -66,7 +67,16 @@ def main():
             print("\n--- Executing Graph Step ---")
             inputs = None if resume_mode else current_input
             
-            for event in graph.stream(inputs, config=config):
+            # Nodes are coroutines, so the graph must be driven asynchronously.
+            # "custom" events carry report text as it streams in; "updates" carry finished nodes.
+            async for mode, event in graph.astream(inputs, config=config, stream_mode=["updates", "custom"]):
+                if mode == "custom":
+                    if event.get("reset"):
+                        print("\n   [Retrying: discard the partial report above]")
+                        continue
+                    sys.stdout.write(event.get("partial", ""))
+                    sys.stdout.flush()
+                    continue
                 for key, value in event.items():
                     print(f"Finished Node: {key}")
                     
@@ -131,4 +141,4 @@ def main():
             break
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -1,9 +1,13 @@
+import ast
 import json
 import re
 import os
+import asyncio
+import threading
 import subprocess
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from langgraph.types import Command, interrupt
+from langgraph.config import get_stream_writer
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig 
 from dotenv import load_dotenv
@@ -28,14 +32,61 @@ def render_tikz_to_svg(tikz_code: str) -> str:
     # It remains here only as a fallback or for legacy support.
     return None
 
+# --- Helper: Spec reconstruction ---
+_SPEC_KEYS = frozenset(BiologicalSpec.__annotations__)
+
+def _coerce_spec(spec_data) -> BiologicalSpec:
+    """Rebuilds a BiologicalSpec from its state dict, dropping keys it doesn't declare (e.g. 'components')."""
+    if isinstance(spec_data, BiologicalSpec): return spec_data
+    return BiologicalSpec(**{k: v for k, v in spec_data.items() if k in _SPEC_KEYS})
+
+# --- Helper: Agent instances ---
+# Agents load the registry (and the retriever its vector index) on construction,
+# so one instance per (agent class, api key) is reused across nodes and retries.
+_AGENT_CACHE: Dict[tuple, Any] = {}
+_AGENT_CACHE_LOCK = threading.Lock()
+
+def _get_agent(agent_cls, api_key: str):
+    key = (agent_cls.__name__, api_key)
+    agent = _AGENT_CACHE.get(key)
+    if agent is None:
+        with _AGENT_CACHE_LOCK:
+            agent = _AGENT_CACHE.get(key)
+            if agent is None:
+                agent = _AGENT_CACHE[key] = agent_cls(api_key=api_key)
+    return agent
+
+# --- Helper: Off-loop agent execution ---
+async def _run_agent(agent_cls, api_key: str, *args):
+    """
+    Gets the agent and runs its blocking execute() (LLM HTTP calls) in a worker thread,
+    so the event loop stays free to serve other graph runs concurrently.
+    """
+    def _call():
+        return _get_agent(agent_cls, api_key).execute(*args)
+    return await asyncio.to_thread(_call)
+
+# --- Helper: Token streaming ---
+def _chunk_emitter(node_name: str):
+    """
+    Returns a callback that forwards LLM text fragments to the graph's "custom" stream.
+    The callback runs in the agent's worker thread, so it hands each chunk back to the event loop.
+    A None chunk (the LLM call is being retried) is sent as a "reset" event.
+    """
+    writer = get_stream_writer()
+    loop = asyncio.get_running_loop()
+    def _emit(text: Optional[str]):
+        event = {"node": node_name, "reset": True} if text is None else {"node": node_name, "partial": text}
+        loop.call_soon_threadsafe(writer, event)
+    return _emit
+
 # --- Nodes ---
 
-def planner_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+async def planner_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     print("--- [Node] Planner: Decomposing Request ---")
     api_key = state.get("api_key") or config.get("configurable", {}).get("api_key")
     
-    agent = PromptDecompositionAgent(api_key=api_key)
-    result = agent.execute(state["user_request"])
+    result = await _run_agent(PromptDecompositionAgent, api_key, state["user_request"])
     
     if not result.success:
         return {"messages": [f"Planning Failed: {result.report_markdown}"], "simulation_status": "failure", "planner_thoughts": result.thoughts}
@@ -46,20 +97,13 @@ def planner_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     
     return {"spec": spec_data, "messages": [result.report_markdown], "components": [], "generated_code": None, "planner_thoughts": result.thoughts}
 
-def retriever_node(state: AgentState) -> Dict[str, Any]:
+async def retriever_node(state: AgentState) -> Dict[str, Any]:
     print("--- [Node] Retriever: Searching Library ---")
     api_key = state.get("api_key")
-    agent = RetrievalGenerationAgent(api_key=api_key)
     
-    spec_data = state["spec"]
-    if isinstance(spec_data, dict):
-        valid_keys = BiologicalSpec.__annotations__.keys()
-        clean_spec = {k: v for k, v in spec_data.items() if k in valid_keys}
-        spec = BiologicalSpec(**clean_spec)
-    else:
-        spec = spec_data
-        
-    result = agent.execute(spec)
+    spec = _coerce_spec(state["spec"])
+
+    result = await _run_agent(RetrievalGenerationAgent, api_key, spec)
     
     if not result.success:
         return {"messages": [f"Retrieval Failed: {result.report_markdown}"], "simulation_status": "failure", "physicist_thoughts": result.thoughts}
@@ -94,23 +138,16 @@ def retriever_node(state: AgentState) -> Dict[str, Any]:
         "physicist_thoughts": result.thoughts
     }
 
-def composer_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+async def composer_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     print("--- [Node] Composer: Stitching Models ---")
     
     api_key = state.get("api_key") or config.get("configurable", {}).get("api_key")
     
     component_objects = [BondGraphModel.from_dict(c) for c in state["components"]]
-    agent = ModelCompositionAgent(api_key=api_key)
     
-    spec_data = state["spec"]
-    if isinstance(spec_data, dict):
-        valid_keys = BiologicalSpec.__annotations__.keys()
-        clean_spec = {k: v for k, v in spec_data.items() if k in valid_keys}
-        spec = BiologicalSpec(**clean_spec)
-    else:
-        spec = spec_data
-        
-    result = agent.execute(component_objects, spec, state["user_request"])
+    spec = _coerce_spec(state["spec"])
+
+    result = await _run_agent(ModelCompositionAgent, api_key, component_objects, spec, state["user_request"])
     
     if not result.success:
         return {"messages": [f"Composition Failed: {result.report_markdown}"], "simulation_status": "failure"}
@@ -131,12 +168,11 @@ def composer_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
         "unit_audit_log": unit_audit # <--- New Unit Audit Log
     }
 
-def parameter_researcher_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+async def parameter_researcher_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     print("--- [Node] Researcher: Analyzing Data ---")
     api_key = state.get("api_key") or config.get("configurable", {}).get("api_key")
     
-    agent = ParameterResearchAgent(api_key=api_key)
-    result = agent.execute(state["user_request"], state["generated_code"], state["composite_model"])
+    result = await _run_agent(ParameterResearchAgent, api_key, state["user_request"], state["generated_code"], state["composite_model"])
     
     if not result.success: return {"messages": [f"Research Failed: {result.report_markdown}"], "curator_thoughts": result.thoughts}
     
@@ -149,18 +185,28 @@ def parameter_researcher_node(state: AgentState, config: RunnableConfig) -> Dict
         "curator_thoughts": result.thoughts
     }
 
-def analyst_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+async def analyst_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     print(f"--- [Node] Analyst: Critical Review (Attempt {state.get('analyst_attempts', 0) + 1}) ---")
     api_key = state.get("api_key") or config.get("configurable", {}).get("api_key")
     
-    agent = AnalystReportingAgent(api_key=api_key)
-    
     user_request = state.get("user_request", "")
     spec = state.get("spec", {})
     code = state.get("generated_code", "")
     curator_data = state.get("curator_output", {})
-    
-    result = agent.execute(user_request, spec, code, curator_data)
+
+    # Code that doesn't parse fails review regardless, so skip the LLM round trip and send it straight back
+    try:
+        ast.parse(code)
+    except Exception as e:
+        return {
+            "simulation_report": f"# Analysis Failed\n\n## ⚠️ Code Compilation Error\n`{str(e)}`",
+            "simulation_status": "failure",
+            "analyst_attempts": state.get("analyst_attempts", 0) + 1,
+            "messages": ["Analyst Review Skipped: generated code does not compile."],
+            "analyst_thoughts": ""
+        }
+
+    result = await _run_agent(AnalystReportingAgent, api_key, user_request, spec, code, curator_data, _chunk_emitter("analyst"))
     
     status = "success"
     if not result.success:
@@ -169,12 +215,6 @@ def analyst_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     else:
         report = result.data
 
-    try: 
-        compile(code, "<string>", "exec")
-    except Exception as e:
-        status = "failure"
-        report += f"\n\n## ⚠️ Code Compilation Error\n`{str(e)}`"
-
     return {
         "simulation_report": report, 
         "simulation_status": status, 
@@ -1,9 +1,18 @@
 import json
 import re
 import os
+import asyncio
+import sqlite3
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 from graph_state import AgentState
+from app_config import config
+
+# Requires: pip install langgraph-checkpoint-sqlite
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:
+    SqliteSaver = None
 from graph_nodes import (
     planner_node,
     retriever_node,
@@ -13,6 +22,50 @@ from graph_nodes import (
     human_help_node
 )
 
+CHECKPOINT_DB = config.get("paths", "checkpoint_db", os.path.join(config.get("paths", "data_dir", "data"), "checkpoints.db"))
+
+if SqliteSaver is not None:
+    class ThreadedSqliteSaver(SqliteSaver):
+        """
+        SqliteSaver only implements the sync checkpointer API. The graph is driven with
+        ainvoke/astream but inspected with get_state/update_state, so the async methods
+        here run the sync ones in a worker thread (SqliteSaver serializes access with its own lock).
+        """
+        async def aget_tuple(self, *args, **kwargs):
+            return await asyncio.to_thread(self.get_tuple, *args, **kwargs)
+
+        async def alist(self, *args, **kwargs):
+            items = await asyncio.to_thread(lambda: list(self.list(*args, **kwargs)))
+            for item in items:
+                yield item
+
+        async def aput(self, *args, **kwargs):
+            return await asyncio.to_thread(self.put, *args, **kwargs)
+
+        async def aput_writes(self, *args, **kwargs):
+            return await asyncio.to_thread(self.put_writes, *args, **kwargs)
+
+        async def adelete_thread(self, *args, **kwargs):
+            return await asyncio.to_thread(self.delete_thread, *args, **kwargs)
+
+def _build_checkpointer():
+    """
+    Persists checkpoints to SQLite (WAL mode) so state lives on disk rather than
+    accumulating in RAM, and survives restarts. Falls back to MemorySaver if unavailable.
+    """
+    if SqliteSaver is None:
+        print("   [Graph] Warning: langgraph-checkpoint-sqlite not installed. Using in-memory checkpoints.")
+        return MemorySaver()
+    try:
+        os.makedirs(os.path.dirname(CHECKPOINT_DB) or ".", exist_ok=True)
+        conn = sqlite3.connect(CHECKPOINT_DB, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return ThreadedSqliteSaver(conn)
+    except Exception as e:
+        print(f"   [Graph] Warning: Could not open checkpoint database {CHECKPOINT_DB}: {e}. Using in-memory checkpoints.")
+        return MemorySaver()
+
 def build_graph():
     builder = StateGraph(AgentState)
 
@@ -47,12 +100,14 @@ def build_graph():
         }
     )
 
-    memory = MemorySaver()
+    memory = _build_checkpointer()
     
-    # UPDATED: Added "researcher" and "analyst" to interrupts for step-by-step progression
+    # Pause only at the two human review points: the plan (before retrieval) and the
+    # composed model (before parameter research). Composer and analyst run straight through;
+    # their progress is visible via astream(stream_mode="updates").
     graph = builder.compile(
         checkpointer=memory,
-        interrupt_before=["retriever", "composer", "researcher", "analyst"]
+        interrupt_before=["retriever", "researcher"]
     )
     
     return graph
\ No newline at end of file
@@ -0,0 +1,19 @@
+# Production launcher: gunicorn -c gunicorn.conf.py server:app
+# (`python server.py` remains the single-process/dev entry point.)
+from app_config import config
+
+bind = "0.0.0.0:8997"
+worker_class = "uvicorn.workers.UvicornWorker"
+# Workers only share threads through the SQLite checkpointer and the project files,
+# so more than one worker requires langgraph-checkpoint-sqlite.
+workers = config.get("server", "workers", 1)
+
+# Import server.py (langgraph, genai, numpy, prompt tables) once in the master;
+# forked workers share those pages copy-on-write instead of importing them N times.
+preload_app = True
+
+def post_fork(server, worker):
+    # The graph built at import holds a SQLite connection, which must not be used across a fork.
+    # Each worker builds its own graph (cheap once the modules are loaded).
+    import server as app_module
+    app_module.graph = app_module.build_graph()
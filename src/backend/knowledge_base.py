@@ -1,12 +1,13 @@
 import os
 import time
-import json
 import numpy as np
+import fast_json
+from functools import lru_cache
 from typing import List, Tuple, Dict, Optional
 from dotenv import load_dotenv
 
 # RateLimiter is now imported from llm_cache to ensure singleton usage
-from llm_cache import cached_embed_content, RateLimiter
+from llm_cache import cached_embed_content, cached_embed_batch, RateLimiter
 from app_config import config
 
 load_dotenv()
@@ -18,6 +19,46 @@ EMBEDDING_MODEL = "models/text-embedding-004"
 # Derived paths for vector storage
 VECTOR_INDEX_FILE = os.path.join(DATA_DIR, "vector_index.npy")
 VECTOR_IDS_FILE = os.path.join(DATA_DIR, "vector_ids.json")
+# Unit-length embeddings lose nothing meaningful for ranking at half precision,
+# and the index is a quarter of the float64 size on disk and in RAM.
+VECTOR_DTYPE = np.float16
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalizes each row (zero rows are left as zeros) and casts to VECTOR_DTYPE."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(VECTOR_DTYPE)
+
+# Rows converted to float32 per step when scoring: bounds the temporary to a few MB
+# instead of a float32 copy of the whole (memory-mapped, half-precision) index.
+_SCORE_BLOCK_ROWS = 4096
+
+def _cosine_scores(matrix: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Dot products of unit-length float32 queries (m, d) with the index rows, accumulated in float32; returns (m, N)."""
+    scores = np.empty((queries.shape[0], matrix.shape[0]), dtype=np.float32)
+    for start in range(0, matrix.shape[0], _SCORE_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + _SCORE_BLOCK_ROWS], dtype=np.float32)
+        scores[:, start:start + block.shape[0]] = queries @ block.T
+    return scores
+
+@lru_cache(maxsize=256)
+def _embed_query(normalized_query: str, api_key: Optional[str]) -> np.ndarray:
+    """
+    Memoizes unit-length query embeddings so repeated searches skip even the disk cache.
+    The returned array is shared between callers, so it is read-only.
+    """
+    result = cached_embed_content(
+        model=EMBEDDING_MODEL,
+        content=normalized_query,
+        task_type="retrieval_query",
+        api_key=api_key
+    )
+    query_vec = np.asarray(result['embedding'], dtype=np.float32)
+    q_norm = np.linalg.norm(query_vec)
+    if q_norm > 0: query_vec = query_vec / q_norm
+    query_vec.setflags(write=False)
+    return query_vec
 
 class LibrarianAgent:
     """
@@ -38,8 +79,8 @@ class LibrarianAgent:
     def _load_registry(self):
         if os.path.exists(REGISTRY_FILE):
             try:
-                with open(REGISTRY_FILE, 'r') as f:
-                    self.registry = json.load(f)
+                with open(REGISTRY_FILE, 'rb') as f:
+                    self.registry = fast_json.loads(f.read())
                 print(f"   [Librarian] Loaded registry with {len(self.registry)} components.")
             except Exception as e:
                 print(f"   [Librarian] Error loading registry: {e}")
@@ -64,27 +105,31 @@ class LibrarianAgent:
 
         print("   [Librarian] Building Vector Index (Registry changed or index missing)...")
         
-        for protein_id, data in self.registry.items():
-            # Construct semantic text
-            text = f"{protein_id} {data.get('description', '')} Keywords: {', '.join(data.get('keywords', []))}"
-            
-            # Rate limiting is handled inside cached_embed_content
-            try:
-                result = cached_embed_content(
-                    model=EMBEDDING_MODEL,
-                    content=text,
-                    task_type="retrieval_document",
-                    api_key=self.api_key
-                )
-                embedding = result['embedding']
-                
-                vectors.append(embedding)
-                self.ids.append(protein_id)
-            except Exception as e:
-                print(f"      [Warning] Failed to embed {protein_id}: {e}")
+        protein_ids = list(self.registry.keys())
+        # Construct semantic text
+        texts = [
+            f"{pid} {data.get('description', '')} Keywords: {', '.join(data.get('keywords', []))}"
+            for pid, data in self.registry.items()
+        ]
+
+        # Cache misses are embedded in batches; rate limiting is handled inside the cache layer
+        embeddings = cached_embed_batch(
+            model=EMBEDDING_MODEL,
+            contents=texts,
+            task_type="retrieval_document",
+            api_key=self.api_key
+        )
+
+        for protein_id, embedding in zip(protein_ids, embeddings):
+            if embedding is None:
+                print(f"      [Warning] Failed to embed {protein_id}")
+                continue
+            vectors.append(embedding)
+            self.ids.append(protein_id)
 
         if vectors:
-            self.vector_matrix = np.array(vectors)
+            # Stored pre-normalized so search is a single matrix-vector product
+            self.vector_matrix = _normalize_rows(np.array(vectors))
             self._save_vectors()
             print(f"   [Librarian] Index built and saved. Shape: {self.vector_matrix.shape}")
 
@@ -96,15 +141,18 @@ class LibrarianAgent:
         if os.path.exists(VECTOR_INDEX_FILE) and os.path.exists(VECTOR_IDS_FILE):
             try:
                 # Load IDs first to check consistency
-                with open(VECTOR_IDS_FILE, 'r') as f:
-                    saved_ids = json.load(f)
+                with open(VECTOR_IDS_FILE, 'rb') as f:
+                    saved_ids = fast_json.loads(f.read())
                 
                 # Check if Registry matches Saved IDs (Set comparison for robustness)
                 current_keys = set(self.registry.keys())
                 saved_keys = set(saved_ids)
                 
                 if current_keys == saved_keys:
-                    self.vector_matrix = np.load(VECTOR_INDEX_FILE)
+                    # Memory-map the index so startup doesn't read the whole matrix; pages load on first search.
+                    # Only indexes saved in VECTOR_DTYPE are known to be normalized; older ones are normalized in memory.
+                    matrix = np.load(VECTOR_INDEX_FILE, mmap_mode='r')
+                    self.vector_matrix = matrix if matrix.dtype == VECTOR_DTYPE else _normalize_rows(matrix)
                     self.ids = saved_ids
                     print(f"   [Librarian] Loaded cached vector index ({len(self.ids)} items).")
                     return True
@@ -121,8 +169,8 @@ class LibrarianAgent:
         try:
             if self.vector_matrix is not None:
                 np.save(VECTOR_INDEX_FILE, self.vector_matrix)
-                with open(VECTOR_IDS_FILE, 'w') as f:
-                    json.dump(self.ids, f)
+                with open(VECTOR_IDS_FILE, 'wb') as f:
+                    f.write(fast_json.dumps(self.ids))
         except Exception as e:
             print(f"   [Librarian] Warning: Failed to save vector index: {e}")
 
@@ -132,27 +180,19 @@ class LibrarianAgent:
 
         # Rate limiting is handled inside cached_embed_content
         try:
-            result = cached_embed_content(
-                model=EMBEDDING_MODEL,
-                content=query,
-                task_type="retrieval_query",
-                api_key=self.api_key
-            )
-            query_vec = np.array(result['embedding'])
+            query_vec = _embed_query(" ".join(query.split()), self.api_key)
         except Exception as e:
             print(f"   [Librarian] Search error: {e}")
             return []
 
-        q_norm = np.linalg.norm(query_vec)
-        if q_norm > 0: query_vec = query_vec / q_norm
-        
-        db_norms = np.linalg.norm(self.vector_matrix, axis=1)
-        
-        with np.errstate(divide='ignore', invalid='ignore'):
-            scores = np.dot(self.vector_matrix, query_vec) / db_norms
-            scores = np.nan_to_num(scores)
+        # Rows of vector_matrix are already unit length: cosine similarity is a plain dot product
+        scores = _cosine_scores(self.vector_matrix, query_vec[None, :])[0]
 
-        top_indices = np.argsort(-scores)[:k]
+        # O(N) selection of the top-k, then sort only those k
+        k_eff = min(k, scores.size)
+        if k_eff <= 0: return []
+        part = np.argpartition(-scores, k_eff - 1)[:k_eff]
+        top_indices = part[np.argsort(-scores[part])]
         
         results = []
         for idx in top_indices:
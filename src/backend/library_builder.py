@@ -1,7 +1,11 @@
 import os
 import json
+import fast_json
 import time
 import re
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, List
 from dotenv import load_dotenv
 import google.generativeai as genai
@@ -14,6 +18,10 @@ from app_config import config
 
 load_dotenv()
 
+# LLM response cleanup: fenced code blocks and // line comments
+_FENCED = re.compile(r"```\w*(.*?)```", re.DOTALL)
+_COMMENT = re.compile(r"^\s*//.*$", re.MULTILINE)
+
 # Setup Gemini Global Config
 api_key = os.getenv("GOOGLE_API_KEY")
 if not api_key:
@@ -57,6 +65,36 @@ def convert_cellml_to_bg_ast(filepath: str, protein_name: str) -> BondGraphModel
             
     return model
 
+# Support files that live alongside models but aren't models themselves
+_NON_MODEL_PREFIXES = ("units", "param", "constant", "ion")
+
+def _iter_model_files(directory: str):
+    """
+    Recursively yields paths of candidate CellML model files under `directory`.
+    Like os.walk's defaults: symlinked directories aren't followed and unreadable ones are skipped.
+    """
+    try:
+        it = os.scandir(directory)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                yield from _iter_model_files(entry.path)
+            elif entry.name.endswith(".cellml") and not entry.name.startswith(_NON_MODEL_PREFIXES):
+                yield entry.path
+
+def _file_sha256(fpath: str) -> str:
+    h = hashlib.sha256()
+    with open(fpath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
 class LibraryBuilder:
     """
     Scans CellML files and uses an LLM to annotate them with 
@@ -77,8 +115,8 @@ class LibraryBuilder:
     def _load_registry(self):
         if os.path.exists(self.registry_file):
             try:
-                with open(self.registry_file, 'r') as f:
-                    self.registry = json.load(f)
+                with open(self.registry_file, 'rb') as f:
+                    self.registry = fast_json.loads(f.read())
                 print(f"--- Loaded existing registry with {len(self.registry)} entries ---")
             except Exception as e:
                 print(f"   [Warning] Could not load registry: {e}")
@@ -88,8 +126,8 @@ class LibraryBuilder:
 
     def _save_registry(self):
         try:
-            with open(self.registry_file, 'w') as f:
-                json.dump(self.registry, f, indent=2)
+            with open(self.registry_file, 'wb') as f:
+                f.write(fast_json.dumps(self.registry, indent=True))
         except Exception as e:
             print(f"   [Error] Failed to save registry: {e}")
 
@@ -100,47 +138,75 @@ class LibraryBuilder:
             print(f"Error: Data directory '{self.library_dir}' not found.")
             return
 
-        model_files = []
-        for root, dirs, files in os.walk(self.library_dir):
-            for file in files:
-                if file.endswith(".cellml") and not file.startswith("units") and not file.startswith("param") and not file.startswith("constant") and not file.startswith("ion"):
-                    model_files.append(os.path.join(root, file))
+        model_files = list(_iter_model_files(self.library_dir))
 
         print(f"Found {len(model_files)} candidate models.",flush=True)
 
+        pending = []
         for fpath in model_files:
             filename = os.path.basename(fpath)
             protein_id = filename.replace("BG_", "").replace(".cellml", "")
 
-            # Re-ingest if version < 4.0 (System Properties Update)
+            # Re-ingest if version < 4.0 (System Properties Update), unless the source file is byte-identical
             if protein_id in self.registry:
-                if "semantic_version" in self.registry[protein_id] and self.registry[protein_id]["semantic_version"] >= 4.0:
+                existing = self.registry[protein_id]
+                if "semantic_version" in existing and existing["semantic_version"] >= 4.0:
                     print(f"   [Skip] {protein_id} is up to date (v4.0).")
                     continue
+                if existing.get("source_sha256") and existing["source_sha256"] == _file_sha256(fpath):
+                    print(f"   [Skip] {protein_id} source unchanged.")
+                    continue
+            pending.append((fpath, protein_id))
 
-            try:
-                self._ingest_model(fpath, protein_id)
-                self._save_registry()
-            except Exception as e:
-                print(f"   [Error] Failed to ingest {fpath}: {e}")
+        # Each ingestion is dominated by its LLM call, so run them concurrently.
+        # Rate limiting still happens inside CachedGenAIModel.
+        max_workers = config.get("ingestion", "max_workers", 8)
+        checkpoint_every = config.get("ingestion", "checkpoint_every", 10)
+        lock = threading.Lock()
+        completed = 0
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(self._ingest_model_worker, fpath, pid): fpath for fpath, pid in pending}
+            for future in as_completed(futures):
+                try:
+                    protein_id, entry = future.result()
+                except Exception as e:
+                    print(f"   [Error] Failed to ingest {futures[future]}: {e}")
+                    continue
+                if entry is None: continue
+                with lock:
+                    self.registry[protein_id] = entry
+                    completed += 1
+                    if completed % checkpoint_every == 0:
+                        self._save_registry()
 
+        with lock:
+            self._save_registry()
         print(f"--- Registry sync complete. Saved to {self.registry_file} ---")
 
-    def _ingest_model(self, fpath: str, protein_id: str):
+    def _ingest_model_worker(self, fpath: str, protein_id: str):
+        return protein_id, self._ingest_model(fpath, protein_id)
+
+    def _ingest_model(self, fpath: str, protein_id: str) -> Dict[str, Any]:
         print(f"\nProcessing: {protein_id} ({os.path.basename(fpath)})",flush=True)
 
-        data = self.loader.parse_file(fpath)
+        # lxml parsers are not safe to share across threads, so each ingestion gets its own loader
+        data = CellMLLoader().parse_file(fpath)
         
         all_equations = []
         all_variables = {}
+        # Only the first `limit` equations reach the prompt, so stop collecting there
+        limit = config.get("ingestion", "context_window_equations", 60)
         
         for comp_name, comp_data in data['components'].items():
-            struct_eqs = comp_data.get('structured_equations', [])
-            if struct_eqs:
-                for eq in struct_eqs:
-                    all_equations.append(f"{eq['lhs']} = {eq['rhs']}")
-            else:
-                all_equations.extend(comp_data.get('equations', []))
+            remaining = limit - len(all_equations)
+            if remaining > 0:
+                struct_eqs = comp_data.get('structured_equations', [])
+                if struct_eqs:
+                    for eq in struct_eqs[:remaining]:
+                        all_equations.append(f"{eq['lhs']} = {eq['rhs']}")
+                else:
+                    all_equations.extend(comp_data.get('equations', [])[:remaining])
             
             for v, props in comp_data.get('variables', {}).items():
                 all_variables[v] = props.get('units', 'unknown')
@@ -149,10 +215,11 @@ class LibraryBuilder:
         
         if not semantic_metadata:
             print(f"   [Skipping] Could not annotate {protein_id}")
-            return
+            return None
 
         entry = {
             "filepath": fpath,
+            "source_sha256": _file_sha256(fpath),
             "semantic_version": 4.0,
             "description": semantic_metadata.get("description", "No description"),
             "keywords": semantic_metadata.get("keywords", []),
@@ -164,8 +231,8 @@ class LibraryBuilder:
             "parameters": semantic_metadata.get("parameters", [])
         }
         
-        self.registry[protein_id] = entry
         print(f"   [Success] Registered {len(entry['ports'])} ports, timescale: {entry['system_properties'].get('timescale', 'unknown')}.")
+        return entry
 
     def _annotate_with_llm(self, protein_id: str, equations: list, variables: dict) -> Dict[str, Any]:
         # self.rate_limiter.wait() <-- Removed
@@ -231,7 +298,7 @@ class LibraryBuilder:
             return None
 
     def _extract_json(self, text: str) -> Dict:
-        match = re.search(r"```\w*(.*?)```", text, re.DOTALL)
+        match = _FENCED.search(text)
         if match:
             text = match.group(1)
         else:
@@ -240,9 +307,9 @@ class LibraryBuilder:
             if start != -1 and end != -1:
                 text = text[start:end]
 
-        text = re.sub(r"^\s*//.*$", "", text, flags=re.MULTILINE)
+        text = _COMMENT.sub("", text)
         try:
-            return json.loads(text.strip())
+            return fast_json.loads(text)
         except Exception as e:
             print(f"   [Parser Error] Could not extract JSON: {e}")
             return None
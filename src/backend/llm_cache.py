@@ -1,13 +1,31 @@
 import os
-import json
+import mmap
+import queue
+import atexit
+import logging
+import logging.handlers
 import hashlib
 import datetime
 import time
 import re
-from typing import Dict
+import sqlite3
+import tempfile
+import threading
+import numpy as np
+import fast_json
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future
+from collections import OrderedDict
 from google.api_core import exceptions
+from contextlib import contextmanager
 from app_config import config
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: writes are only serialized within this process
+
 # --- NEW SDK IMPORT ---
 # Requires: pip install google-genai
 try:
@@ -20,6 +38,12 @@ except ImportError:
 # Load paths from config
 CACHE_FILE = config.get("paths", "cache_file", "genai_cache.json")
 LOG_FILE = config.get("paths", "log_file", "llm_interaction.log")
+# Response store: length-prefixed records plus an index of their locations.
+# CACHE_FILE (and its .log journal) is the legacy format, read once to migrate.
+CACHE_BLOB_FILE = f"{CACHE_FILE}.blob"
+CACHE_INDEX_FILE = f"{CACHE_FILE}.idx"
+CACHE_LOG_FILE = f"{CACHE_FILE}.log"
+EMBEDDING_CACHE_FILE = config.get("paths", "embedding_cache_file", f"{os.path.splitext(CACHE_FILE)[0]}_embeddings.sqlite")
 
 # --- RATE LIMITER IMPLEMENTATION ---
 
@@ -38,22 +62,36 @@ class RateLimiter:
 
         self.rpm = limits.get("rpm", 15)
         self.delay = 60.0 / self.rpm
-        self.last_call = 0
+
+        # Token bucket: allows bursts up to the per-minute budget, refilled continuously.
+        # Shared across threads, so all bookkeeping happens under the lock on a monotonic clock.
+        self.capacity = float(self.rpm)
+        self.tokens = self.capacity
+        self.refill_rate = self.rpm / 60.0
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
 
     def wait(self):
-        now = time.time()
-        elapsed = now - self.last_call
-        if elapsed < self.delay:
-            time.sleep(self.delay - elapsed)
-        self.last_call = time.time()
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_rate)
+            self.last_refill = now
+            # Claim a token now; if the bucket is empty this leaves a debt that the sleep pays off,
+            # so concurrent waiters queue up one refill interval apart instead of bursting together
+            self.tokens -= 1.0
+            sleep_for = -self.tokens / self.refill_rate if self.tokens < 0 else 0.0
+        if sleep_for > 0:
+            time.sleep(sleep_for)
 
 # Singleton registry for rate limiters to ensure global enforcement per model
 _RATE_LIMITERS: Dict[str, RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
 
 def get_rate_limiter(model_name: str) -> RateLimiter:
-    if model_name not in _RATE_LIMITERS:
-        _RATE_LIMITERS[model_name] = RateLimiter(model_name)
-    return _RATE_LIMITERS[model_name]
+    with _RATE_LIMITERS_LOCK:
+        if model_name not in _RATE_LIMITERS:
+            _RATE_LIMITERS[model_name] = RateLimiter(model_name)
+        return _RATE_LIMITERS[model_name]
 
 
 # --- CACHE & LOGGING UTILS ---
@@ -61,9 +99,9 @@ def get_rate_limiter(model_name: str) -> RateLimiter:
 def _load_cache():
     if os.path.exists(CACHE_FILE):
         try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
+            with open(CACHE_FILE, 'rb') as f:
+                return fast_json.loads(f.read())
+        except fast_json.JSONDecodeError:
             print(f"   [Cache] Error: Cache file {CACHE_FILE} is corrupt. Starting with empty cache.")
             return {}
         except Exception as e:
@@ -71,15 +109,419 @@ def _load_cache():
             return {}
     return {}
 
-def _save_cache(cache):
+def _load_legacy_journal(cache) -> int:
+    """Applies entries from the JSONL journal used before the blob store. Damaged lines are skipped."""
+    if not os.path.exists(CACHE_LOG_FILE): return 0
+    count = 0
     try:
-        # Write to temp file then rename for atomic write
-        temp_file = f"{CACHE_FILE}.tmp"
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            json.dump(cache, f, indent=2, sort_keys=True)
-        os.replace(temp_file, CACHE_FILE)
+        with open(CACHE_LOG_FILE, 'rb') as f:
+            for line in f:
+                try:
+                    record = fast_json.loads(line)
+                except fast_json.JSONDecodeError:
+                    continue
+                cache[record["key"]] = record["entry"]
+                count += 1
     except Exception as e:
-        print(f"   [Cache] Warning: Failed to save cache: {e}")
+        print(f"   [Cache] Error reading cache journal: {e}")
+    return count
+
+def _mkstemp_beside(path: str) -> Tuple[int, str]:
+    """A private temp file in `path`'s directory (so os.replace stays atomic), readable like a normal file."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}.")
+    os.fchmod(fd, 0o644)
+    return fd, temp_path
+
+def _unlink_quietly(path: str):
+    try: os.unlink(path)
+    except OSError: pass
+
+class ResponseCache:
+    """
+    Append-only store for LLM responses.
+    Entries are length-prefixed JSON records in a blob file; an index log of
+    (key, offset, length) lines locates them. Only the index is held in memory,
+    a miss appends one record instead of rewriting the cache, and hits read
+    their record straight out of a memory map of the blob.
+    New entries are written by a background thread in batches; until then they
+    are served from memory.
+    The index is kept in LRU order and capped at `max_entries`; evicted records
+    stay in the blob until enough dead ones accumulate to rewrite it with only
+    the live entries.
+    Compaction replaces the blob with a new file and bumps a generation counter
+    (inode numbers alone can be reused), so other processes sharing the cache
+    notice it and reload the index. Reads, appends and compaction all hold the
+    cache's file lock, so no process sees a half-replaced blob/index pair.
+    """
+    FLUSH_BATCH = 32
+    FLUSH_WAIT = 0.5
+
+    def __init__(self, blob_path: str, index_path: str, max_entries: int = 10000):
+        self.blob_path = blob_path
+        self.index_path = index_path
+        self.max_entries = max_entries
+        self._index: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+        self._index_lines = 0
+        self._pending: Dict[str, Dict] = {}
+        self._queue = queue.Queue()
+        self._flusher = None
+        self._lock = threading.RLock()
+        self._flock_depth = 0
+        self._mm = None
+        self._mm_size = 0
+        self._blob_ident = None
+        with self._file_lock():
+            self._load_index()
+
+    def _disk_ident(self) -> tuple:
+        """Identifies the blob/index pair on disk: the blob's inode plus the compaction generation."""
+        try:
+            st = os.stat(self.blob_path)
+            blob = (st.st_dev, st.st_ino)
+        except FileNotFoundError:
+            blob = None
+        try:
+            with open(f"{self.index_path}.gen", 'rb') as f:
+                generation = int(f.read() or 0)
+        except (OSError, ValueError):
+            generation = 0
+        return blob, generation
+
+    def _refresh(self):
+        """Reloads the index if another process has replaced (compacted) or created the blob since we read it."""
+        with self._file_lock():
+            if self._disk_ident() == self._blob_ident: return
+            if self._mm is not None: self._mm.close()
+            self._mm, self._mm_size = None, 0
+            self._index = OrderedDict()
+            self._index_lines = 0
+            self._load_index()
+
+    def _load_index(self):
+        """
+        Caller holds _file_lock: no other process is between its blob and index replaces
+        (compaction) or midway through an index append, so the pair read here is consistent
+        and a torn last line can only be left over from a crash.
+        """
+        self._blob_ident = self._disk_ident()
+        if not os.path.exists(self.index_path): return
+        damaged = False
+        try:
+            with open(self.index_path, 'rb') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) != 3 or not line.endswith(b"\n"):
+                        damaged = True
+                        continue
+                    key = parts[0].decode('ascii')
+                    self._index.pop(key, None)
+                    self._index[key] = (int(parts[1]), int(parts[2]))
+                    self._index_lines += 1
+        except Exception as e:
+            print(f"   [Cache] Error reading cache index: {e}")
+        self._evict()
+        if self._index_lines > 2 * self.max_entries:
+            self._compact()
+        # Don't append after a torn line: the next record would be glued onto it
+        elif damaged:
+            self._rewrite_index()
+
+    def _rewrite_index(self):
+        with self._file_lock():
+            fd, temp_file = _mkstemp_beside(self.index_path)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(b"".join(f"{k} {off} {length}\n".encode('ascii') for k, (off, length) in self._index.items()))
+                os.replace(temp_file, self.index_path)
+            except BaseException:
+                _unlink_quietly(temp_file)
+                raise
+            self._index_lines = len(self._index)
+
+    @contextmanager
+    def _file_lock(self):
+        """
+        Thread lock plus an exclusive flock on <index>.lock. Every path that writes the blob,
+        the index or the generation file runs under it (put_many, _compact, _rewrite_index, and
+        _load_index's repairs), as do index reloads and record reads.
+        """
+        with self._lock:
+            # Re-entrant like the RLock: a second flock on a new descriptor would block on the first
+            if fcntl is None or self._flock_depth:
+                self._flock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._flock_depth -= 1
+                return
+            with open(f"{self.index_path}.lock", 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                self._flock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._flock_depth = 0
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _evict(self):
+        while len(self._index) > self.max_entries:
+            self._index.popitem(last=False)
+
+    def _compact(self):
+        """Rewrites the blob and index with only the live records (payload bytes are copied as-is)."""
+        with self._file_lock():
+            self._refresh()
+            if not os.path.exists(self.blob_path): return
+            try:
+                self._remap()
+            except ValueError:  # empty blob: every indexed record is dead
+                pass
+            compacted: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+            blob_fd, blob_tmp = _mkstemp_beside(self.blob_path)
+            index_fd, index_tmp = _mkstemp_beside(self.index_path)
+            try:
+                with os.fdopen(blob_fd, 'wb') as f:
+                    for key, (offset, length) in self._index.items():
+                        if offset + length > self._mm_size: continue
+                        f.write(length.to_bytes(4, 'little'))
+                        compacted[key] = (f.tell(), length)
+                        f.write(self._mm[offset:offset + length])
+                    f.flush()
+                    os.fsync(f.fileno())
+                with os.fdopen(index_fd, 'wb') as f:
+                    f.write(b"".join(f"{k} {off} {length}\n".encode('ascii') for k, (off, length) in compacted.items()))
+                    f.flush()
+                    os.fsync(f.fileno())
+                if self._mm is not None: self._mm.close()
+                self._mm, self._mm_size = None, 0
+                # get() checks each record's length prefix, so a crash between these two
+                # replaces only turns stale index entries into misses
+                os.replace(blob_tmp, self.blob_path)
+                os.replace(index_tmp, self.index_path)
+            except BaseException:
+                _unlink_quietly(blob_tmp)
+                _unlink_quietly(index_tmp)
+                raise
+            self._bump_generation()
+            self._blob_ident = self._disk_ident()
+            self._index = compacted
+            self._index_lines = len(compacted)
+            print(f"   [Cache] Compacted response cache to {len(compacted)} entries")
+
+    def _bump_generation(self):
+        gen_path = f"{self.index_path}.gen"
+        generation = self._disk_ident()[1] + 1
+        fd, temp_file = _mkstemp_beside(gen_path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(str(generation).encode('ascii'))
+            os.replace(temp_file, gen_path)
+        except BaseException:
+            _unlink_quietly(temp_file)
+            raise
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._pending or key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index.keys() | self._pending.keys())
+
+    def get(self, key: str, default=None):
+        entry = self._pending.get(key)
+        if entry is not None: return entry
+        # The file lock keeps a compaction in another process from replacing the blob mid-read
+        with self._file_lock():
+            self._refresh()
+            loc = self._index.get(key)
+            if loc is None: return default
+            self._index.move_to_end(key)
+            offset, length = loc
+            # The blob only grows between compactions; remap when a record lies beyond the current mapping
+            if offset + length > self._mm_size:
+                try:
+                    self._remap()
+                except (OSError, ValueError) as e:  # blob missing, or empty (mmap of length 0)
+                    print(f"   [Cache] Warning: Cannot map cache blob: {e}")
+                    return default
+            valid = (4 <= offset and offset + length <= self._mm_size
+                     and int.from_bytes(self._mm[offset - 4:offset], 'little') == length)
+            payload = self._mm[offset:offset + length] if valid else None
+        try:
+            if payload is not None: return fast_json.loads(payload)
+        except ValueError:  # malformed JSON or non-UTF-8 bytes
+            pass
+        print(f"   [Cache] Dropping unreadable cache record {key}")
+        with self._lock:
+            self._index.pop(key, None)
+        return default
+
+    def __getitem__(self, key: str):
+        entry = self.get(key, _MISSING)
+        if entry is _MISSING: raise KeyError(key)
+        return entry
+
+    def _remap(self):
+        if self._mm is not None: self._mm.close()
+        self._mm, self._mm_size = None, 0
+        with open(self.blob_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mm_size = len(self._mm)
+
+    def put(self, key: str, entry: Dict):
+        """Makes the entry visible immediately and queues it for the background writer."""
+        with self._lock:
+            self._pending[key] = entry
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="response-cache-flusher", daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+        self._queue.put(key)
+
+    def _flush_loop(self):
+        while True:
+            keys = [self._queue.get()]
+            # Gather a batch: up to FLUSH_BATCH keys, or whatever arrives within FLUSH_WAIT
+            try:
+                while len(keys) < self.FLUSH_BATCH:
+                    keys.append(self._queue.get(timeout=self.FLUSH_WAIT))
+            except queue.Empty:
+                pass
+            try:
+                with self._lock:
+                    items = [(k, self._pending[k]) for k in dict.fromkeys(keys) if k in self._pending]
+                    if items: self._write_pending(items)
+            except Exception as e:
+                print(f"   [Cache] Warning: Failed to save cache entries: {e}")
+
+    def flush(self):
+        """Writes every pending entry now (called at interpreter exit)."""
+        with self._lock:
+            if self._pending:
+                self._write_pending(list(self._pending.items()))
+
+    def _write_pending(self, items):
+        self.put_many(items)
+        for key, _ in items:
+            self._pending.pop(key, None)
+
+    def put_many(self, items):
+        """Appends records to the blob, then their locations to the index (both fsynced)."""
+        with self._file_lock():
+            # Offsets must refer to the current blob, not one another process compacted away
+            self._refresh()
+            index_lines = []
+            with open(self.blob_path, 'ab') as f:
+                f.seek(0, os.SEEK_END)
+                for key, entry in items:
+                    payload = fast_json.dumps(entry)
+                    f.write(len(payload).to_bytes(4, 'little'))
+                    offset = f.tell()
+                    f.write(payload)
+                    self._index.pop(key, None)
+                    self._index[key] = (offset, len(payload))
+                    index_lines.append(f"{key} {offset} {len(payload)}\n".encode('ascii'))
+                f.flush()
+                os.fsync(f.fileno())
+            self._blob_ident = self._disk_ident()
+            with open(self.index_path, 'ab') as f:
+                f.write(b"".join(index_lines))
+                f.flush()
+                os.fsync(f.fileno())
+            self._index_lines += len(index_lines)
+            self._evict()
+            if self._index_lines > 2 * self.max_entries:
+                self._compact()
+
+_MISSING = object()
+_CACHE_LOCK = threading.Lock()
+_CACHE: Optional[ResponseCache] = None
+
+def _get_cache() -> ResponseCache:
+    """Returns the process-wide response cache, migrating the legacy JSON cache on first use."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                cache = ResponseCache(CACHE_BLOB_FILE, CACHE_INDEX_FILE, config.get("cache", "max_entries", 10000))
+                if not os.path.exists(CACHE_INDEX_FILE):
+                    legacy = _load_cache()
+                    _load_legacy_journal(legacy)
+                    if legacy:
+                        cache.put_many(legacy.items())
+                        print(f"   [Cache] Migrated {len(legacy)} entries from {CACHE_FILE}")
+                _CACHE = cache
+    return _CACHE
+
+def _put_cache_entry(key: str, entry: Dict):
+    try:
+        _get_cache().put(key, entry)
+    except Exception as e:
+        print(f"   [Cache] Warning: Failed to save cache entry: {e}")
+
+class EmbeddingStore:
+    """
+    Persistent embedding cache backed by SQLite.
+    Vectors are stored as raw float32 bytes keyed by sha256(model|task_type|text),
+    so they survive restarts and load without any JSON parsing.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, task_type: str, text: str) -> str:
+        return hashlib.sha256(f"{model}|{task_type}|{text}".encode('utf-8')).hexdigest()
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        return self._conn
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        try:
+            with self._lock:
+                row = self._connect().execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        except Exception as e:
+            print(f"   [Cache] Error reading embedding store: {e}")
+            return None
+        return np.frombuffer(row[0], dtype=np.float32) if row else None
+
+    def put(self, key: str, values):
+        blob = np.asarray(values, dtype=np.float32).tobytes()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", (key, blob))
+                conn.commit()
+        except Exception as e:
+            print(f"   [Cache] Warning: Failed to save embedding: {e}")
+
+_EMBEDDING_STORE = EmbeddingStore(EMBEDDING_CACHE_FILE)
+
+# Interaction log writes happen on a listener thread; callers only enqueue the formatted entry
+_LOG_QUEUE = queue.Queue()
+_INTERACTION_LOGGER: Optional[logging.Logger] = None
+_INTERACTION_LOGGER_LOCK = threading.Lock()
+
+def _get_interaction_logger() -> logging.Logger:
+    global _INTERACTION_LOGGER
+    if _INTERACTION_LOGGER is None:
+        with _INTERACTION_LOGGER_LOCK:
+            if _INTERACTION_LOGGER is None:
+                handler = logging.FileHandler(LOG_FILE, mode='a', encoding='utf-8', delay=True)
+                handler.terminator = ""  # entries carry their own newlines
+                listener = logging.handlers.QueueListener(_LOG_QUEUE, handler)
+                listener.start()
+                atexit.register(listener.stop)
+
+                logger = logging.getLogger("llm_interaction")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                logger.addHandler(logging.handlers.QueueHandler(_LOG_QUEUE))
+                _INTERACTION_LOGGER = logger
+    return _INTERACTION_LOGGER
 
 def _log_interaction(prompt, response_text, model_name, is_hit, thoughts=None, normalized_key=None):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -100,25 +542,145 @@ def _log_interaction(prompt, response_text, model_name, is_hit, thoughts=None, n
     )
     
     try:
-        with open(LOG_FILE, 'a', encoding='utf-8') as f:
-            f.write(log_entry)
+        _get_interaction_logger().info(log_entry)
     except Exception as e:
         print(f"   [Warning] Failed to write to debug log: {e}")
 
+# Prompt normalization: punctuation to strip and filler words to drop from cache keys
+_NORM_RE = re.compile(r'[^\w\s\.\-]')
+_STOP_WORDS = frozenset({
+    "a", "an", "the", "please", "could", "would", "you", 
+    "generate", "create", "write", "me", "for", "is", "are"
+})
+
+# ASCII fast path: the same character filter as _NORM_RE as a translation table
+_NORM_TABLE = str.maketrans({
+    c: ' ' for c in map(chr, range(128))
+    if not (c.isalnum() or c.isspace() or c in '_.-')
+})
+
 def _normalize_prompt(text: str) -> str:
     """
     Extracts the semantic core of a prompt for caching purposes.
     """
     if not text: return ""
-    norm = text.lower()
-    norm = re.sub(r'[^\w\s\.\-]', ' ', norm)
-    tokens = norm.split()
-    stop_words = {
-        "a", "an", "the", "please", "could", "would", "you", 
-        "generate", "create", "write", "me", "for", "is", "are"
-    }
-    filtered_tokens = [t for t in tokens if t not in stop_words]
-    return " ".join(filtered_tokens)
+    text = text.lower()
+    text = text.translate(_NORM_TABLE) if text.isascii() else _NORM_RE.sub(' ', text)
+    # Stop words are dropped per whitespace token. A \b-alternation regex would also
+    # strip them inside tokens like "re-write" or "the.x", changing existing cache keys.
+    return " ".join(t for t in text.split() if t not in _STOP_WORDS)
+
+def _schema_bytes(response_schema) -> bytes:
+    try:
+        if hasattr(response_schema, 'to_json'):
+            return response_schema.to_json().encode('utf-8')
+        if isinstance(response_schema, dict):
+            return fast_json.dumps(response_schema, sort_keys=True)
+        return str(response_schema).encode('utf-8')
+    except:
+        return b"UNKNOWN"
+
+def _hash_field(h, tag: bytes, data: bytes):
+    # Length-prefixed so field boundaries can't be forged by content
+    h.update(tag)
+    h.update(len(data).to_bytes(8, 'little'))
+    h.update(data)
+
+def _generate_cache_key(model_name, normalized_prompt, system_instruction=None, response_schema=None) -> str:
+    """
+    BLAKE2b-128 over the raw bytes of every key component, streamed into one hash object.
+    Cache keys only need a good spread, not cryptographic strength.
+    """
+    if not system_instruction and not response_schema:
+        # Common case: same bytes as the streamed path below, hashed in one call
+        model, prompt = model_name.encode('utf-8'), normalized_prompt.encode('utf-8')
+        return hashlib.blake2b(b"".join((
+            b"GENERATE", len(model).to_bytes(8, 'little'), model,
+            b"PROMPT", len(prompt).to_bytes(8, 'little'), prompt,
+        )), digest_size=16).hexdigest()
+
+    h = hashlib.blake2b(digest_size=16)
+    _hash_field(h, b"GENERATE", model_name.encode('utf-8'))
+    _hash_field(h, b"PROMPT", normalized_prompt.encode('utf-8'))
+    if system_instruction:
+        _hash_field(h, b"SYS", system_instruction.encode('utf-8'))
+    if response_schema:
+        _hash_field(h, b"SCHEMA", _schema_bytes(response_schema))
+    return h.hexdigest()
+
+def _legacy_cache_key(model_name, normalized_prompt, system_instruction=None, response_schema=None) -> str:
+    """The original MD5-of-MD5s key, used only to find entries written before the key change."""
+    md5 = lambda b: hashlib.md5(b).hexdigest()
+    key_components = [
+        f"GENERATE:{model_name}",
+        f"PROMPT:{normalized_prompt}"
+    ]
+    if system_instruction:
+        key_components.append(f"SYS:{md5(system_instruction.encode('utf-8'))}")
+    if response_schema:
+        schema = _schema_bytes(response_schema)
+        key_components.append("SCHEMA:UNKNOWN" if schema == b"UNKNOWN" else f"SCHEMA:{md5(schema)}")
+    return md5(":".join(key_components).encode('utf-8'))
+
+# --- CLIENTS ---
+
+# One client per API key: each holds its own HTTP connection pool, so reuse keeps connections alive
+_CLIENT_CACHE: Dict[str, "genai.Client"] = {}
+_CLIENT_LOCK = threading.Lock()
+
+def _get_client(api_key: Optional[str]):
+    client = _CLIENT_CACHE.get(api_key)
+    if client is None:
+        with _CLIENT_LOCK:
+            client = _CLIENT_CACHE.get(api_key)
+            if client is None:
+                client = _CLIENT_CACHE[api_key] = genai.Client(api_key=api_key)
+    return client
+
+@lru_cache(maxsize=16)
+def _embed_config(task_type: str):
+    return types.EmbedContentConfig(task_type=task_type)
+
+_CONFIG_CACHE_SIZE = 128
+
+# schema_key -> schema, evicted in step with _build_config's lru_cache. Keys are content
+# hashes, so a config still cached for an evicted key always carries the same schema.
+_SCHEMAS: "OrderedDict[str, object]" = OrderedDict()
+_SCHEMAS_LOCK = threading.Lock()
+
+def _schema_key(response_schema) -> Optional[str]:
+    """Hashable stand-in for a response schema: a hash of the same bytes the cache key uses."""
+    if response_schema is None: return None
+    key = hashlib.blake2b(_schema_bytes(response_schema), digest_size=16).hexdigest()
+    with _SCHEMAS_LOCK:
+        _SCHEMAS[key] = response_schema
+        _SCHEMAS.move_to_end(key)
+        while len(_SCHEMAS) > _CONFIG_CACHE_SIZE:
+            _SCHEMAS.popitem(last=False)
+    return key
+
+@lru_cache(maxsize=_CONFIG_CACHE_SIZE)
+def _build_config(schema_key: Optional[str], system_instruction: Optional[str], thinking: bool):
+    """Shared generation config; callers must not mutate it."""
+    response_schema = _SCHEMAS.get(schema_key) if schema_key else None
+    mime_type = "application/json" if response_schema else None
+    if thinking:
+        config = types.GenerateContentConfig(
+            temperature=0.0,
+            thinking_config=types.ThinkingConfig(include_thoughts=True),
+            response_mime_type=mime_type,
+            response_schema=response_schema
+        )
+    else:
+        config = types.GenerateContentConfig(
+            temperature=0.0,
+            top_k=1,
+            response_mime_type=mime_type,
+            response_schema=response_schema
+        )
+    if system_instruction:
+        config.system_instruction = system_instruction
+    return config
 
 class UnifiedResponse:
     def __init__(self, text, thoughts=None):
@@ -138,43 +700,54 @@ class CachedGenAIModel:
         if not self.client:
             if not self.api_key:
                 self.api_key = os.getenv("GOOGLE_API_KEY")
-            self.client = genai.Client(api_key=self.api_key)
+            self.client = _get_client(self.api_key)
 
-    def generate_content(self, prompt, response_schema=None, system_instruction=None):
-        self._ensure_client()
-        cache = _load_cache()
+    def _request(self, prompt, config, on_chunk=None):
+        """
+        Runs one generation and returns (final_text, thought_parts).
+        With `on_chunk`, the streaming endpoint is used and each answer fragment is passed on as it arrives.
+        """
+        if on_chunk is None:
+            responses = [self.client.models.generate_content(model=self.model_name, contents=prompt, config=config)]
+        else:
+            responses = self.client.models.generate_content_stream(model=self.model_name, contents=prompt, config=config)
+
+        text_parts = []
+        thoughts = []
+        for response in responses:
+            if not response.candidates or not response.candidates[0].content: continue
+            for part in response.candidates[0].content.parts or []:
+                if not part.text: continue
+                if getattr(part, 'thought', False):
+                    thoughts.append(part.text)
+                else:
+                    text_parts.append(part.text)
+                    if on_chunk: on_chunk(part.text)
+        return "".join(text_parts), thoughts
+
+    def generate_content(self, prompt, response_schema=None, system_instruction=None, on_chunk=None):
+        """
+        `on_chunk`, if given, receives the response text incrementally (once, in full, on a cache hit).
+        `on_chunk(None)` means: discard the text received so far, a failed attempt is being retried.
+        """
+        cache = _get_cache()
         
         # --- SEMANTIC CACHING ---
         normalized_prompt = _normalize_prompt(prompt)
-        key_components = [
-            f"GENERATE:{self.model_name}",
-            f"PROMPT:{normalized_prompt}"
-        ]
-        
-        if system_instruction:
-            sys_hash = hashlib.md5(system_instruction.encode('utf-8')).hexdigest()
-            key_components.append(f"SYS:{sys_hash}")
-            
-        if response_schema:
-            try:
-                if hasattr(response_schema, 'to_json'):
-                    schema_str = response_schema.to_json()
-                elif isinstance(response_schema, dict):
-                    schema_str = json.dumps(response_schema, sort_keys=True)
-                else:
-                    schema_str = str(response_schema)
-                schema_hash = hashlib.md5(schema_str.encode('utf-8')).hexdigest()
-                key_components.append(f"SCHEMA:{schema_hash}")
-            except:
-                key_components.append("SCHEMA:UNKNOWN")
-
-        key_content = ":".join(key_components)
-        h = hashlib.md5(key_content.encode('utf-8')).hexdigest()
+        h = _generate_cache_key(self.model_name, normalized_prompt, system_instruction, response_schema)
+
+        # Single lookups: get() turns unreadable or concurrently evicted records into misses
+        entry = cache.get(h)
+        # Legacy: entries used to be keyed by MD5. Re-key on first use.
+        if entry is None:
+            legacy_h = _legacy_cache_key(self.model_name, normalized_prompt, system_instruction, response_schema)
+            entry = cache.get(legacy_h)
+            if entry is not None:
+                _put_cache_entry(h, entry)
         
         # --- CACHE READ ---
-        if h in cache:
+        if entry is not None:
             print(f"   [Cache] Hit ({self.model_name})")
-            entry = cache[h]
             if isinstance(entry, dict):
                 response_text = entry.get('response', '')
                 thoughts_text = entry.get('thoughts', None)
@@ -183,9 +756,11 @@ class CachedGenAIModel:
                 thoughts_text = None
             
             _log_interaction(prompt, response_text, self.model_name, is_hit=True, thoughts=thoughts_text, normalized_key=normalized_prompt)
+            if on_chunk and response_text: on_chunk(response_text)
             return UnifiedResponse(response_text, thoughts_text)
             
         # --- API CALL (NEW SDK) ---
+        self._ensure_client()
         # ENFORCE RATE LIMIT BEFORE CALL
         self.rate_limiter.wait()
         
@@ -193,59 +768,35 @@ class CachedGenAIModel:
         
         retries = 5
         base_delay = 1
+        schema_key = _schema_key(response_schema)
+
+        # A streamed attempt can fail after emitting fragments; reset the consumer before resending
+        emitted = False
+        def _emit(text):
+            nonlocal emitted
+            emitted = True
+            on_chunk(text)
+        def _attempt(config):
+            nonlocal emitted
+            if emitted:
+                on_chunk(None)
+                emitted = False
+            return self._request(prompt, config, _emit if on_chunk else None)
         
         for attempt in range(retries + 1):
             try:
-                mime_type = "application/json" if response_schema else None
-                
-                config = types.GenerateContentConfig(
-                    temperature=0.0,
-                    thinking_config=types.ThinkingConfig(include_thoughts=True),
-                    response_mime_type=mime_type,
-                    response_schema=response_schema
-                )
-                
                 try:
-                    kwargs = {
-                        "model": self.model_name,
-                        "contents": prompt,
-                        "config": config
-                    }
-                    if system_instruction:
-                        kwargs["config"].system_instruction = system_instruction
-
-                    response = self.client.models.generate_content(**kwargs)
+                    config = _build_config(schema_key, system_instruction, True)
+                    final_text, thoughts_extracted = _attempt(config)
                     
                 except Exception as e:
                     if "400" in str(e) or "INVALID_ARGUMENT" in str(e):
                         print(f"   [API] Model {self.model_name} rejected ThinkingConfig. Retrying standard.")
-                        standard_config = types.GenerateContentConfig(
-                            temperature=0.0,
-                            top_k=1,
-                            response_mime_type=mime_type,
-                            response_schema=response_schema
-                        )
-                        if system_instruction:
-                            standard_config.system_instruction = system_instruction
-                            
-                        response = self.client.models.generate_content(
-                            model=self.model_name,
-                            contents=prompt,
-                            config=standard_config
-                        )
+                        standard_config = _build_config(schema_key, system_instruction, False)
+                        final_text, thoughts_extracted = _attempt(standard_config)
                     else:
                         raise e
 
-                final_text = ""
-                thoughts_extracted = []
-                
-                if response.candidates:
-                    for part in response.candidates[0].content.parts:
-                        if getattr(part, 'thought', False):
-                            thoughts_extracted.append(part.text)
-                        else:
-                            final_text += part.text or ""
-                
                 final_thoughts = "\n".join(thoughts_extracted) if thoughts_extracted else None
 
                 if final_text:
@@ -260,8 +811,7 @@ class CachedGenAIModel:
                         "response": final_text,
                         "timestamp": datetime.datetime.now().isoformat()
                     }
-                    cache[h] = cache_entry
-                    _save_cache(cache)
+                    _put_cache_entry(h, cache_entry)
                     _log_interaction(prompt, final_text, self.model_name, is_hit=False, thoughts=final_thoughts, normalized_key=normalized_prompt)
                     
                 return UnifiedResponse(final_text, final_thoughts)
@@ -279,21 +829,11 @@ class CachedGenAIModel:
                 print(f"   [API Error] {e}")
                 raise e
 
-def cached_embed_content(model, content, task_type, api_key=None):
-    client = genai.Client(api_key=api_key or os.getenv("GOOGLE_API_KEY"))
-    
-    cache = _load_cache()
-    normalized_content = " ".join(content.split())
-    key = f"EMBED:{model}:{normalized_content}:{task_type}"
-    h = hashlib.md5(key.encode('utf-8')).hexdigest()
-    
-    if h in cache:
-        return {'embedding': cache[h]}
-    
-    # Enforce Rate Limit for Embeddings too
-    limiter = get_rate_limiter(model)
-    limiter.wait()
-
+def _embed_with_retry(client, model, contents, task_type):
+    """
+    Calls embed_content with exponential backoff on quota errors.
+    `contents` may be a single string or a list; returns the list of embedding values.
+    """
     retries = 5
     base_delay = 1
     
@@ -304,16 +844,169 @@ def cached_embed_content(model, content, task_type, api_key=None):
         try:
             result = client.models.embed_content(
                 model=model, 
-                contents=content, 
-                config=types.EmbedContentConfig(task_type=task_type)
+                contents=contents, 
+                config=_embed_config(task_type)
             )
-            embedding_values = result.embeddings[0].values
-            cache[h] = embedding_values
-            _save_cache(cache)
-            return {'embedding': embedding_values}
+            return [e.values for e in result.embeddings]
             
         except exceptions.ResourceExhausted:
             if attempt == retries: raise
             time.sleep(base_delay * (2 ** attempt))
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests for one model and API key.
+    A worker thread sends whatever has queued up after MAX_WAIT seconds, or as soon
+    as MAX_BATCH texts are waiting, as one embed_content call per task type.
+    Identical requests that are still pending share a single future.
+    """
+    MAX_BATCH = 64
+    MAX_WAIT = 0.05
+    # Upper bound for a caller's wait; covers _embed_with_retry's backoff plus rate-limit queueing
+    RESULT_TIMEOUT = 300
+
+    def __init__(self, model: str, api_key: Optional[str]):
+        self.model = model
+        self.api_key = api_key
+        self._queue = queue.Queue()
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, content: str, task_type: str) -> Future:
+        key = (task_type, content)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None: return future
+            future = self._pending[key] = Future()
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=f"embedding-batcher-{self.model}", daemon=True)
+                self._worker.start()
+        self._queue.put(key)
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.MAX_WAIT
+            while len(batch) < self.MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            by_task: Dict[str, List[str]] = {}
+            for task_type, content in batch:
+                by_task.setdefault(task_type, []).append(content)
+            for task_type, contents in by_task.items():
+                # A failed batch must not stop the worker or leave its callers waiting
+                try:
+                    self._send(task_type, contents)
+                except Exception as e:
+                    self._fail(task_type, contents, e)
+
+    def _send(self, task_type: str, contents: List[str]):
+        try:
+            get_rate_limiter(self.model).wait()
+            values = _embed_with_retry(_get_client(self.api_key), self.model, contents, task_type)
+            if len(values) != len(contents):
+                raise ValueError(f"embed_content returned {len(values)} embeddings for {len(contents)} texts")
+        except Exception as e:
+            self._fail(task_type, contents, e)
+            return
+
+        with self._lock:
+            futures = [self._pending.pop((task_type, c), None) for c in contents]
+        for future, value in zip(futures, values):
+            if future is not None: future.set_result(value)
+
+    def _fail(self, task_type: str, contents: List[str], error: Exception):
+        with self._lock:
+            futures = [self._pending.pop((task_type, c), None) for c in contents]
+        for future in futures:
+            if future is not None and not future.done(): future.set_exception(error)
+
+_EMBEDDING_BATCHERS: Dict[Tuple[str, Optional[str]], EmbeddingBatcher] = {}
+_EMBEDDING_BATCHERS_LOCK = threading.Lock()
+
+def _get_embedding_batcher(model: str, api_key: Optional[str]) -> EmbeddingBatcher:
+    with _EMBEDDING_BATCHERS_LOCK:
+        batcher = _EMBEDDING_BATCHERS.get((model, api_key))
+        if batcher is None:
+            batcher = _EMBEDDING_BATCHERS[(model, api_key)] = EmbeddingBatcher(model, api_key)
+        return batcher
+
+def cached_embed_content(model, content, task_type, api_key=None):
+    """
+    Returns {'embedding': np.ndarray(float32)}. Checks the persistent embedding
+    store first, then the legacy JSON cache, and only then calls the API
+    (through the shared EmbeddingBatcher, so concurrent misses go out together).
+    """
+    normalized_content = " ".join(content.split())
+    store_key = EmbeddingStore.make_key(model, task_type, normalized_content)
+    
+    vector = _EMBEDDING_STORE.get(store_key)
+    if vector is not None:
+        return {'embedding': vector}
+
+    # Legacy: embeddings used to live in the JSON response cache. Promote on first use.
+    vector = _promote_legacy_embedding(_get_cache(), model, task_type, normalized_content, store_key)
+    if vector is not None:
+        return {'embedding': vector}
+    
+    # Rate limiting happens once per batch inside the batcher
+    batcher = _get_embedding_batcher(model, api_key or os.getenv("GOOGLE_API_KEY"))
+    vector = np.asarray(batcher.submit(content, task_type).result(timeout=batcher.RESULT_TIMEOUT), dtype=np.float32)
+    _EMBEDDING_STORE.put(store_key, vector)
+    return {'embedding': vector}
+
+def cached_embed_batch(model, contents, task_type, api_key=None, batch_size=100):
+    """
+    Batched variant of cached_embed_content.
+    Returns a list aligned with `contents` of float32 vectors (None where a batch failed).
+    Only cache misses are sent to the API, `batch_size` texts per request.
+    """
+    normalized = [" ".join(c.split()) for c in contents]
+    keys = [EmbeddingStore.make_key(model, task_type, n) for n in normalized]
+    vectors = [_EMBEDDING_STORE.get(k) for k in keys]
+
+    misses = [i for i, v in enumerate(vectors) if v is None]
+    if misses:
+        legacy_cache = _get_cache()
+        for i in misses:
+            vectors[i] = _promote_legacy_embedding(legacy_cache, model, task_type, normalized[i], keys[i])
+        misses = [i for i in misses if vectors[i] is None]
+    if not misses:
+        return vectors
+
+    client = _get_client(api_key or os.getenv("GOOGLE_API_KEY"))
+    limiter = get_rate_limiter(model)
+
+    for start in range(0, len(misses), batch_size):
+        chunk = misses[start:start + batch_size]
+        limiter.wait()
+        try:
+            values = _embed_with_retry(client, model, [contents[i] for i in chunk], task_type)
+        except Exception as e:
+            print(f"   [Warning] Embedding batch of {len(chunk)} failed: {e}")
+            continue
+        for i, v in zip(chunk, values):
+            vectors[i] = np.asarray(v, dtype=np.float32)
+            _EMBEDDING_STORE.put(keys[i], vectors[i])
+
+    return vectors
+
+def _promote_legacy_embedding(cache, model, task_type, normalized_content, store_key):
+    """Moves an embedding from the legacy JSON cache into the embedding store, if present."""
+    key = f"EMBED:{model}:{normalized_content}:{task_type}"
+    h = hashlib.md5(key.encode('utf-8')).hexdigest()
+    legacy = cache.get(h)
+    if legacy is None:
+        return None
+    vector = np.asarray(legacy, dtype=np.float32)
+    _EMBEDDING_STORE.put(store_key, vector)
+    return vector
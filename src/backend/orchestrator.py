@@ -1,6 +1,6 @@
 import os
 import datetime
-from typing import Optional
+from typing import Optional, Tuple
 from agent_types import AgentResult
 from bio_agents import (
     PromptDecompositionAgent, 
@@ -35,6 +35,22 @@ class OR_LLM:
             "Parameters": ParameterAgent()
         }
 
+        # State -> step handler; each returns (result, advance) and sets the next state
+        self._dispatch = {
+            "DECOMPOSING": self._step_decomp,
+            "RETRIEVING": self._step_retrieval,
+            "COMPOSING": self._step_composition,
+            "PARAMETRIZING": self._step_parameters,
+            "FINALIZING": self._step_final
+        }
+        # Checkpoint -> state to resume with once the user responds
+        self._hitl_resume = {
+            "HITL_1": "RETRIEVING",
+            "HITL_2": "COMPOSING",
+            "HITL_3": "PARAMETRIZING",
+            "HITL_4": "FINALIZING"
+        }
+
     def start_pipeline(self, user_prompt: str) -> str:
         """Starts the workflow."""
         self.context["user_prompt"] = user_prompt
@@ -43,79 +59,92 @@ class OR_LLM:
 
     def run_step(self, user_feedback: str = None) -> AgentResult:
         """
-        Executes the current step in the pipeline.
+        Executes pipeline steps until one needs user input, fails, or the pipeline finishes.
         """
-        
-        # --- STEP 1: DECOMPOSITION ---
-        if self.state == "DECOMPOSING":
-            print(">>> [OR_LLM] Dispatching to Decomposition Agent...")
-            result = self.agents["Decomposition"].execute(self.context["user_prompt"])
-            self.context["reports"]["decomposition"] = result.report_markdown
-            
-            if result.success:
-                self.context["spec"] = result.data
-                if result.needs_hitl and not user_feedback:
-                    self.state = "HITL_1"
-                    return result 
-                
-                self.state = "RETRIEVING"
-                return self.run_step()
-            else:
+        while True:
+            result, advance = self._dispatch_once(user_feedback)
+            user_feedback = None  # Feedback applies to the step it was given for only
+            if not advance:
                 return result
 
+    def _dispatch_once(self, user_feedback: str = None) -> Tuple[Optional[AgentResult], bool]:
+        """
+        Executes the current step. Returns (result, advance): `advance` is True when
+        the state moved on and the next step should run immediately.
+        """
         # --- HITL CHECKPOINTS ---
         if self.state.startswith("HITL"):
             print(f">>> [OR_LLM] Received User Feedback: {user_feedback}")
-            if self.state == "HITL_1": self.state = "RETRIEVING"
-            elif self.state == "HITL_2": self.state = "COMPOSING"
-            elif self.state == "HITL_3": self.state = "PARAMETRIZING"
-            elif self.state == "HITL_4": self.state = "FINALIZING"
-            return self.run_step()
+            next_state = self._hitl_resume.get(self.state)
+            if next_state is None:
+                return AgentResult(False, None, "Unknown State"), False
+            self.state = next_state
+            return None, True
 
-        # --- STEP 2: RETRIEVAL ---
-        if self.state == "RETRIEVING":
-            print(">>> [OR_LLM] Dispatching to Retrieval Agent...")
-            result = self.agents["Retrieval"].execute(self.context["spec"])
-            self.context["reports"]["retrieval"] = result.report_markdown
-            
-            if result.success:
-                self.context["components"] = result.data
-                self.state = "COMPOSING"
-                return self.run_step() # Auto-proceed for demo
-            return result
+        handler = self._dispatch.get(self.state)
+        if handler is None:
+            return AgentResult(False, None, "Unknown State"), False
+        return handler(user_feedback)
 
-        # --- STEP 3: COMPOSITION ---
-        if self.state == "COMPOSING":
-            print(">>> [OR_LLM] Dispatching to Composition Agent...")
-            result = self.agents["Composition"].execute(
-                self.context["components"], 
-                self.context["spec"]
-            )
-            self.context["reports"]["composition"] = result.report_markdown
+    # --- STEP 1: DECOMPOSITION ---
+    def _step_decomp(self, user_feedback: str = None) -> Tuple[AgentResult, bool]:
+        print(">>> [OR_LLM] Dispatching to Decomposition Agent...")
+        result = self.agents["Decomposition"].execute(self.context["user_prompt"])
+        self.context["reports"]["decomposition"] = result.report_markdown
+        
+        if result.success:
+            self.context["spec"] = result.data
+            if result.needs_hitl and not user_feedback:
+                self.state = "HITL_1"
+                return result, False
             
-            if result.success:
-                self.context["composite_model"] = result.data
-                self.state = "PARAMETRIZING"
-                return self.run_step()
-            return result
+            self.state = "RETRIEVING"
+            return result, True
+        else:
+            return result, False
 
-        # --- STEP 4: PARAMETERS ---
-        if self.state == "PARAMETRIZING":
-            print(">>> [OR_LLM] Dispatching to Parameter Agent...")
-            # Pass the code/model from composition
-            result = self.agents["Parameters"].execute(self.context["composite_model"])
-            self.context["reports"]["parameters"] = result.report_markdown
-            self.context["final_package"] = result.data
-            
-            self.state = "FINALIZING"
-            return self.run_step()
+    # --- STEP 2: RETRIEVAL ---
+    def _step_retrieval(self, user_feedback: str = None) -> Tuple[AgentResult, bool]:
+        print(">>> [OR_LLM] Dispatching to Retrieval Agent...")
+        result = self.agents["Retrieval"].execute(self.context["spec"])
+        self.context["reports"]["retrieval"] = result.report_markdown
+        
+        if result.success:
+            self.context["components"] = result.data
+            self.state = "COMPOSING"
+            return result, True # Auto-proceed for demo
+        return result, False
 
-        # --- FINAL ASSEMBLY ---
-        if self.state == "FINALIZING":
-            final_report = self._generate_final_report()
-            return AgentResult(True, self.context["final_package"], final_report)
+    # --- STEP 3: COMPOSITION ---
+    def _step_composition(self, user_feedback: str = None) -> Tuple[AgentResult, bool]:
+        print(">>> [OR_LLM] Dispatching to Composition Agent...")
+        result = self.agents["Composition"].execute(
+            self.context["components"], 
+            self.context["spec"]
+        )
+        self.context["reports"]["composition"] = result.report_markdown
+        
+        if result.success:
+            self.context["composite_model"] = result.data
+            self.state = "PARAMETRIZING"
+            return result, True
+        return result, False
+
+    # --- STEP 4: PARAMETERS ---
+    def _step_parameters(self, user_feedback: str = None) -> Tuple[AgentResult, bool]:
+        print(">>> [OR_LLM] Dispatching to Parameter Agent...")
+        # Pass the code/model from composition
+        result = self.agents["Parameters"].execute(self.context["composite_model"])
+        self.context["reports"]["parameters"] = result.report_markdown
+        self.context["final_package"] = result.data
+        
+        self.state = "FINALIZING"
+        return result, True
 
-        return AgentResult(False, None, "Unknown State")
+    # --- FINAL ASSEMBLY ---
+    def _step_final(self, user_feedback: str = None) -> Tuple[AgentResult, bool]:
+        final_report = self._generate_final_report()
+        return AgentResult(True, self.context["final_package"], final_report), False
 
     def _generate_final_report(self) -> str:
         return f"""
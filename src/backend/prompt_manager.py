@@ -1,14 +1,20 @@
-import json
+import string
+import textwrap
+import fast_json
 
-class PromptManager:
+def _to_json(obj, indent: bool = True, sort_keys: bool = True) -> str:
+    """JSON text for embedding in a prompt (sorted keys unless the input order is already stable)."""
+    return fast_json.dumps(obj, indent=indent, sort_keys=sort_keys).decode('utf-8')
+
+# --- System instructions (static; built once at import) ---
 
-    @staticmethod
-    def get_bondgraph_system_instruction():
-        """
-        Returns the strict system prompt (Role/Instructions) for Bond Graph generation.
-        RESTORING FULL FIDELITY from original monolithic prompt.
-        """
-        return """# Role
+def _prompt(text: str) -> str:
+    """Strips the source indentation (and trailing spaces) from a prompt literal so it isn't sent to the model."""
+    head, _, body = text.partition("\n")
+    text = head + "\n" + textwrap.dedent(body)
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+_BONDGRAPH_SYSTEM_INSTRUCTION = _prompt("""# Role
     You are an expert in Network Thermodynamics, Systems Biology, and Bond Graph modeling. Your goal is to translate biological descriptions (e.g., "epithelial cell homeostasis", "cardiac myocyte excitation") into formal, energy-conserving Bond Graph models.
 
     # Core Objective
@@ -91,14 +97,9 @@ class PromptManager:
         "List of components that were required but not found in the library"
     ]
     }
-    """
+    """)
 
-    @staticmethod
-    def get_equation_generation_prompts(spec, system_context, missing_defs):
-        """
-        Returns (system_instruction, user_message) for Equation Generation.
-        """
-        system_instruction = """# Role
+_EQUATION_SYSTEM_INSTRUCTION = _prompt("""# Role
         You are an expert Computational Biologist and Bond Graph Modeler. 
         Your task is to mathematically define the internal physics for specific biological components that are missing from our library.
 
@@ -137,39 +138,9 @@ class PromptManager:
             }}
         ]
         }}
-        """
-
-        user_message = f"""# Context
-        We are building a model: "{spec.get('model_name')}".
-        
-        ## 1. System Architecture (The "Blueprint")
-        **System Rationale:** {spec.get('explanation')}
-        
-        **CRITICAL INSTRUCTIONS (Handover from Architect):**
-        "{spec.get('next_step_context')}"
-        
-        *Strict Adherence:* You MUST follow the Architect's instructions regarding Physics (e.g., "Use Mass Action", "Use GHK Flux") and Stoichiometry.
-
-        ## 2. Existing System Variables (The "Interface")
-        Your equations must connect to these existing external variables. Do not invent new names for these quantities.
-        
-        {system_context}
+        """)
 
-        ## 3. Missing Components to Generate
-        The following components were identified as missing. You must generate the full mathematical definition for each.
-        
-        {json.dumps(missing_defs, indent=2,sort_keys=True)}
-        """
-        
-        return system_instruction, user_message
-    
-    @staticmethod
-    def get_composition_prompts(user_request, spec, components_context):
-        """
-        Returns (system_instruction, user_message) for Composition.
-        Restored strict Unit Audit and Provenance Tracking instructions.
-        """
-        system_instruction = """# Role
+_COMPOSITION_SYSTEM_INSTRUCTION = _prompt("""# Role
         You are a Senior Research Software Engineer specializing in Computational Biology. 
         Your task is to synthesize a complete, runnable Python model by composing a set of provided library components.
 
@@ -230,24 +201,9 @@ class PromptManager:
             "topology_summary": "Explanation of how components were wired...",
             "mermaid_code": "A graph TD mermaid string visualizing the component connections."
         }}
-        """
+        """)
 
-        user_message = f"""# Input Data
-        **User Request:** "{user_request}"
-        **System Specification:** {json.dumps(spec.get('intent_summary'),sort_keys=True)}
-        
-        **Available Components:**
-        {components_context}
-        """
-        
-        return system_instruction, user_message
-
-    @staticmethod
-    def get_update_bondgraph_system_instruction():
-        """
-        Returns the strict system prompt for Refinement.
-        """
-        return """# Role
+_UPDATE_BONDGRAPH_SYSTEM_INSTRUCTION = _prompt("""# Role
     You are an expert in Network Thermodynamics and Bond Graph modeling.
     Refinement Phase: The user has manually adjusted the Model Selection Matrix.
 
@@ -265,18 +221,9 @@ class PromptManager:
 
     # Output Format: Single JSON Object
     (Same schema as standard Bond Graph output)
-    """
-
-    @staticmethod
-    def get_parameterization_prompts(user_request, generated_components, current_code=None):
-        """
-        Returns (system_instruction, user_message) for Parameterization.
-        Restored strict unit targets and Chain-of-Thought logic.
-        """
-        target_list = generated_components.get('generated_components', [])
-        target_json = json.dumps(target_list, indent=2,sort_keys=True) if target_list else "[] (Requires Code Audit)"
+    """)
 
-        system_instruction = """# Role
+_PARAMETERIZATION_SYSTEM_INSTRUCTION = _prompt("""# Role
         You are a Principal Computational Biologist. 
         Your goal is to rigorously parameterize a Bond Graph model by replacing "Assumptions" with "Literature Values".
 
@@ -327,33 +274,9 @@ class PromptManager:
             "global_constants": {{ "T": {{...}}, "F": {{...}}, "R": {{...}} }},
             "issues_report": []
         }}
-        """
-
-        user_message = f"""# Input Data
-        **User Request:** "{user_request}"
-        
-        **Explicit Target List:**
-        {target_json}
+        """)
 
-        **Current Model Code:**
-        ```python
-        {current_code if current_code else "# No code provided"}
-        ```
-        """
-        
-        return system_instruction, user_message
-
-    @staticmethod
-    def get_analyst_report_prompts(user_request, spec, generated_code, curator_data):
-        """
-        Returns (system_instruction, user_message) for Analyst.
-        """
-        params_summary = []
-        if curator_data and 'parameter_set' in curator_data:
-            for p in curator_data['parameter_set']:
-                params_summary.append(f"- {p.get('parameter_name')}: {p.get('value')} {p.get('units')} ({p.get('source_citation')})")
-
-        system_instruction = """# Role
+_ANALYST_SYSTEM_INSTRUCTION = _prompt("""# Role
         You are a Senior Systems Biology Analyst. 
         Produce a rigorous "Model Validation Plan & Critical Analysis Report".
 
@@ -384,29 +307,9 @@ class PromptManager:
 
         # Output Format
         Output **ONLY** the Markdown text.
-        """
-
-        user_message = f"""# Project Context
-        **User Request:** "{user_request}"
-        **Model Intent:** "{spec.get('intent_summary', 'N/A')}"
-        
-        **Selected Parameters:**
-        {chr(10).join(params_summary)}
+        """)
 
-        **Generated Code:**
-        ```python
-        {generated_code}
-        ```
-        """
-        
-        return system_instruction, user_message
-
-    @staticmethod
-    def get_bondgraph_diagram_prompts(user_request, spec, current_code):
-        """
-        Returns (system_instruction, user_message) for Gatekeeper/Diagram generation.
-        """
-        system_instruction = """# Role
+_DIAGRAM_SYSTEM_INSTRUCTION = _prompt("""# Role
         You are a Senior Research Software Engineer and Validation Analyst.
         You are the "Gatekeeper". Verify code, visualize it, and finalize it.
 
@@ -429,16 +332,201 @@ class PromptManager:
             "validation_report": ["Checked imports...", "Fixed X..."],
             "model_status": "READY_FOR_SIMULATION"
         }}
-        """
+        """)
+
+# --- User message templates (dedented and compiled to render functions once) ---
+
+_NO_CODE = "# No code provided"
+
+def _compile_template(template: str):
+    """
+    Generates a function that assembles `template` (str.format syntax, plain named fields only)
+    by joining its literal pieces with the keyword arguments, so the template is never re-parsed.
+    """
+    pieces, fields = [], []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if literal: pieces.append(repr(literal))
+        if field is None: continue
+        assert field.isidentifier() and not spec and not conversion, f"Unsupported template field: {field}"
+        if field not in fields: fields.append(field)
+        pieces.append(f"str({field})")
+    namespace = {}
+    exec(f"def render(*, {', '.join(fields)}):\n    return ''.join(({', '.join(pieces)},))\n", namespace)
+    return namespace['render']
+
+_render_equation_user = _compile_template(_prompt("""# Context
+        We are building a model: "{model_name}".
+        
+        ## 1. System Architecture (The "Blueprint")
+        **System Rationale:** {explanation}
+        
+        **CRITICAL INSTRUCTIONS (Handover from Architect):**
+        "{next_step_context}"
+        
+        *Strict Adherence:* You MUST follow the Architect's instructions regarding Physics (e.g., "Use Mass Action", "Use GHK Flux") and Stoichiometry.
+
+        ## 2. Existing System Variables (The "Interface")
+        Your equations must connect to these existing external variables. Do not invent new names for these quantities.
+        
+        {system_context}
 
-        user_message = f"""# Input Data
+        ## 3. Missing Components to Generate
+        The following components were identified as missing. You must generate the full mathematical definition for each.
+        
+        {missing_defs}
+        """))
+
+_render_composition_user = _compile_template(_prompt("""# Input Data
         **User Request:** "{user_request}"
-        **Architect's Intent:** {spec.get('intent_summary')}
+        **System Specification:** {intent_json}
         
-        **Draft Code:**
+        **Available Components:**
+        {components_context}
+        """))
+
+_render_parameterization_user = _compile_template(_prompt("""# Input Data
+        **User Request:** "{user_request}"
+        
+        **Explicit Target List:**
+        {target_json}
+
+        **Current Model Code:**
         ```python
         {current_code}
         ```
-        """
+        """))
+
+_render_analyst_user = _compile_template(_prompt("""# Project Context
+        **User Request:** "{user_request}"
+        **Model Intent:** "{intent_summary}"
         
-        return system_instruction, user_message
\ No newline at end of file
+        **Selected Parameters:**
+        {params_summary}
+
+        **Generated Code:**
+        ```python
+        {generated_code}
+        ```
+        """))
+
+_render_diagram_user = _compile_template(_prompt("""# Input Data
+        **User Request:** "{user_request}"
+        **Architect's Intent:** {intent_summary}
+        
+        **Draft Code:**
+        ```python
+        {current_code}
+        ```
+        """))
+
+# --- Prompt builders ---
+
+def get_bondgraph_system_instruction():
+    """
+    Returns the strict system prompt (Role/Instructions) for Bond Graph generation.
+    RESTORING FULL FIDELITY from original monolithic prompt.
+    """
+    return _BONDGRAPH_SYSTEM_INSTRUCTION
+
+def get_equation_generation_prompts(spec, system_context, missing_defs):
+    """
+    Returns (system_instruction, user_message) for Equation Generation.
+    """
+    system_instruction = _EQUATION_SYSTEM_INSTRUCTION
+
+    user_message = _render_equation_user(
+        model_name=spec.get('model_name'),
+        explanation=spec.get('explanation'),
+        next_step_context=spec.get('next_step_context'),
+        system_context=system_context,
+        # Not memoized: freezing the nested dicts into a hashable key costs ~10x the orjson dump
+        missing_defs=_to_json(missing_defs, sort_keys=False),
+    )
+    
+    return system_instruction, user_message
+
+def get_composition_prompts(user_request, spec, components_context):
+    """
+    Returns (system_instruction, user_message) for Composition.
+    Restored strict Unit Audit and Provenance Tracking instructions.
+    """
+    system_instruction = _COMPOSITION_SYSTEM_INSTRUCTION
+
+    user_message = _render_composition_user(
+        user_request=user_request,
+        intent_json=_to_json(spec.get('intent_summary'), indent=False),
+        components_context=components_context,
+    )
+    
+    return system_instruction, user_message
+
+def get_update_bondgraph_system_instruction():
+    """
+    Returns the strict system prompt for Refinement.
+    """
+    return _UPDATE_BONDGRAPH_SYSTEM_INSTRUCTION
+
+def get_parameterization_prompts(user_request, generated_components, current_code=None):
+    """
+    Returns (system_instruction, user_message) for Parameterization.
+    Restored strict unit targets and Chain-of-Thought logic.
+    """
+    target_list = generated_components.get('generated_components', [])
+    target_json = _to_json(target_list) if target_list else "[] (Requires Code Audit)"
+
+    system_instruction = _PARAMETERIZATION_SYSTEM_INSTRUCTION
+
+    user_message = _render_parameterization_user(
+        user_request=user_request,
+        target_json=target_json,
+        current_code=current_code or _NO_CODE,
+    )
+    
+    return system_instruction, user_message
+
+def get_analyst_report_prompts(user_request, spec, generated_code, curator_data):
+    """
+    Returns (system_instruction, user_message) for Analyst.
+    """
+    params_summary = ""
+    if curator_data and 'parameter_set' in curator_data:
+        # Literal keys are already interned constants with cached hashes; .get tolerates rows the LLM left incomplete
+        params_summary = "\n".join(
+            f"- {p.get('parameter_name')}: {p.get('value')} {p.get('units')} ({p.get('source_citation')})"
+            for p in curator_data['parameter_set']
+        )
+
+    system_instruction = _ANALYST_SYSTEM_INSTRUCTION
+
+    user_message = _render_analyst_user(
+        user_request=user_request,
+        intent_summary=spec.get('intent_summary', 'N/A'),
+        params_summary=params_summary,
+        generated_code=generated_code,
+    )
+    
+    return system_instruction, user_message
+
+def get_bondgraph_diagram_prompts(user_request, spec, current_code):
+    """
+    Returns (system_instruction, user_message) for Gatekeeper/Diagram generation.
+    """
+    system_instruction = _DIAGRAM_SYSTEM_INSTRUCTION
+
+    user_message = _render_diagram_user(
+        user_request=user_request,
+        intent_summary=spec.get('intent_summary'),
+        current_code=current_code,
+    )
+    
+    return system_instruction, user_message
+
+class PromptManager:
+    """Namespace kept for existing callers; the builders are plain module functions."""
+    get_bondgraph_system_instruction = staticmethod(get_bondgraph_system_instruction)
+    get_equation_generation_prompts = staticmethod(get_equation_generation_prompts)
+    get_composition_prompts = staticmethod(get_composition_prompts)
+    get_update_bondgraph_system_instruction = staticmethod(get_update_bondgraph_system_instruction)
+    get_parameterization_prompts = staticmethod(get_parameterization_prompts)
+    get_analyst_report_prompts = staticmethod(get_analyst_report_prompts)
+    get_bondgraph_diagram_prompts = staticmethod(get_bondgraph_diagram_prompts)
@@ -1,14 +1,21 @@
 import os
+import asyncio
 import sys
 import uuid
+import hashlib
+import tempfile
+import importlib.util
 import uvicorn
-import json
 import time
 import datetime
+import threading
 from pathlib import Path
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 # Ensure src modules are in path
@@ -17,11 +24,20 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from graph_workflow import build_graph
 from graph_state import AgentState
 from app_config import config
+import fast_json
 from bio_agents import PromptDecompositionAgent
 from agent_types import BiologicalSpec
 # render_tikz_to_svg removed as per request
 
-app = FastAPI(title="Bond Graph Architect API")
+def _json_default(o):
+    return o.__dict__ if hasattr(o, '__dict__') else str(o)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by fast_json (orjson when available), with the same fallback as project snapshots."""
+    def render(self, content: Any) -> bytes:
+        return fast_json.dumps(content, default=_json_default)
+
+app = FastAPI(title="Bond Graph Architect API", default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +46,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Poll/list payloads carry full project state (code, logs, thoughts) and compress ~5-10x.
+# Small responses go out uncompressed; level 5 keeps CPU per request low.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 graph = build_graph()
 
@@ -42,22 +61,81 @@ try:
 except Exception as e:
     print(f"ERROR:    Could not create user data directory at {USERS_DIR}: {e}")
 
+# Users whose directory this process has already created
+_ENSURED_USER_DIRS = set()
+_USER_DIRS_LOCK = threading.Lock()
+
 def get_user_dir(username: str) -> Path:
     user_path = USERS_DIR / username
-    user_path.mkdir(exist_ok=True)
+    if username not in _ENSURED_USER_DIRS:
+        with _USER_DIRS_LOCK:
+            user_path.mkdir(exist_ok=True)
+            _ENSURED_USER_DIRS.add(username)
     return user_path
 
+def _atomic_write(path: Path, data: bytes) -> os.stat_result:
+    """
+    Writes `data` to a private temp file, fsyncs it, then swaps it in, so readers and crashes
+    never see a partial file. Returns the stat of the written file (rename keeps inode and mtime).
+    """
+    # Unique per call: concurrent writers (threads or workers) must not share a temp file
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        try:
+            os.fchmod(fd, 0o644)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+            stats = os.fstat(fd)
+        finally:
+            os.close(fd)
+        os.replace(temp_name, path)
+        return stats
+    except BaseException:
+        try: os.unlink(temp_name)
+        except OSError: pass
+        raise
+
+# Last snapshot this process wrote per project file: (digest, inode, mtime_ns).
+# A write is skipped only if the file on disk is still that exact file, so a save by
+# another worker (new inode) or thread in between always forces a rewrite.
+_SAVED_DIGESTS: Dict[Path, tuple] = {}
+
+# AgentState fields written to the project file. api_key is deliberately absent
+# (SECURITY FIX: never persist the key); a field missing here is lost on reload.
+PERSIST_KEYS = (
+    "project_name", "project_notes", "user_request", "user_id",
+    "spec", "planner_thoughts",
+    "components", "physicist_output", "physicist_thoughts",
+    "composite_model", "generated_code", "composer_logs", "composer_thoughts", "unit_audit_log",
+    "curator_output", "curator_thoughts",
+    "simulation_report", "analyst_thoughts", "simulation_status", "analyst_attempts",
+    "messages",
+)
+
 def save_project(username: str, thread_id: str, state: Dict):
+    """
+    Writes the human-readable project export. Live state is in the graph's SQLite
+    checkpointer (graph_workflow._build_checkpointer) and poll reads it from there.
+    This file backs the project listing and the restore of threads the checkpointer
+    doesn't have, so it's written once per mutating request, never per poll.
+    """
     user_dir = get_user_dir(username)
     file_path = user_dir / f"{thread_id}.json"
     try:
-        # SECURITY FIX: Remove API key before saving
-        state_to_save = state.copy()
-        if "api_key" in state_to_save:
-            del state_to_save["api_key"]
-            
-        with open(file_path, 'w') as f:
-            json.dump(state_to_save, f, default=lambda o: o.__dict__ if hasattr(o, '__dict__') else str(o), indent=2)
+        state_to_save = {k: state[k] for k in PERSIST_KEYS if k in state}
+        data = fast_json.dumps(state_to_save, indent=True, default=_json_default)
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        saved = _SAVED_DIGESTS.get(file_path)
+        if saved is not None and saved[0] == digest:
+            try:
+                current = file_path.stat()
+                if (current.st_ino, current.st_mtime_ns) == saved[1:]: return
+            except FileNotFoundError:
+                pass
+        stats = _atomic_write(file_path, data)
+        _SAVED_DIGESTS[file_path] = (digest, stats.st_ino, stats.st_mtime_ns)
         print(f"INFO:     Saved project {thread_id} for {username}")
     except Exception as e:
         print(f"ERROR:    Failed to save project {thread_id}: {e}")
@@ -67,14 +145,31 @@ def load_project(username: str, thread_id: str) -> Optional[Dict]:
     file_path = user_dir / f"{thread_id}.json"
     if file_path.exists():
         try:
-            with open(file_path, 'r') as f: return json.load(f)
+            return fast_json.loads(file_path.read_bytes())
         except: return None
     return None
 
+@lru_cache(maxsize=512)
+def _load_project_cached(username: str, thread_id: str, mtime_ns: int) -> Dict:
+    """Parsed project file; keyed on mtime so any save invalidates it. Callers must not mutate the result."""
+    return fast_json.loads((USERS_DIR / username / f"{thread_id}.json").read_bytes())
+
+def _stat_project(username: str, thread_id: str) -> Optional[os.stat_result]:
+    try: return (USERS_DIR / username / f"{thread_id}.json").stat()
+    except OSError: return None
+
+def restore_if_empty(config: Dict, username: str, thread_id: str):
+    """Loads a saved project into the checkpointer when the graph holds no state for the thread."""
+    if graph.get_state(config).values: return
+    saved_state = load_project(username, thread_id)
+    if not saved_state: raise HTTPException(status_code=404, detail="Thread not found")
+    graph.update_state(config, saved_state)
+
 def delete_project_file(username: str, thread_id: str) -> bool:
     user_dir = get_user_dir(username)
     file_path = user_dir / f"{thread_id}.json"
     if file_path.exists():
+        _SAVED_DIGESTS.pop(file_path, None)
         try: os.remove(file_path); return True
         except: return False
     return False
@@ -115,7 +210,37 @@ class DeleteRequest(BaseModel):
 def get_config(thread_id: str):
     return {"configurable": {"thread_id": thread_id}}
 
-def serialize_state(state: AgentState, next_nodes: tuple, file_stats: os.stat_result = None) -> Dict[str, Any]:
+# Serialized views of file-backed states: (id(state), next_nodes, mtime_ns) -> (state, payload).
+# Keeping `state` in the value pins it, so its id can't be reused by another object while cached.
+_SERIALIZE_CACHE: Dict[tuple, tuple] = {}
+_SERIALIZE_CACHE_SIZE = 256
+_SERIALIZE_CACHE_LOCK = threading.Lock()
+
+def serialize_state(state: AgentState, next_nodes: tuple, file_stats: os.stat_result = None,
+                    last_updated_ms: Optional[int] = None) -> Dict[str, Any]:
+    # Live snapshots are new objects on every read, so only file-backed states can repeat
+    if file_stats is None:
+        return _serialize_state(state, next_nodes, file_stats, last_updated_ms)
+    key = (id(state), tuple(next_nodes or ()), file_stats.st_mtime_ns)
+    with _SERIALIZE_CACHE_LOCK:
+        cached = _SERIALIZE_CACHE.get(key)
+    if cached is not None and cached[0] is state:
+        return cached[1]
+    payload = _serialize_state(state, next_nodes, file_stats)
+    with _SERIALIZE_CACHE_LOCK:
+        if len(_SERIALIZE_CACHE) >= _SERIALIZE_CACHE_SIZE:
+            del _SERIALIZE_CACHE[next(iter(_SERIALIZE_CACHE))]
+        _SERIALIZE_CACHE[key] = (state, payload)
+    return payload
+
+def _message_text(msg) -> str:
+    """History entries are plain strings; message objects contribute their content, not their repr."""
+    if type(msg) is str: return msg
+    if hasattr(msg, "content"): return msg.content
+    return str(msg)
+
+def _serialize_state(state: AgentState, next_nodes: tuple, file_stats: os.stat_result = None,
+                     last_updated_ms: Optional[int] = None) -> Dict[str, Any]:
     # Default State
     current_node = "planner"
     status = "running"
@@ -163,18 +288,18 @@ def serialize_state(state: AgentState, next_nodes: tuple, file_stats: os.stat_re
 
     now_ms = int(time.time() * 1000)
     last_updated = now_ms
-    if file_stats:
+    if last_updated_ms is not None:
+        last_updated = last_updated_ms
+    elif file_stats:
         last_updated = int(file_stats.st_mtime * 1000)
 
     raw_msgs = state.get("messages", [])
-    frontend_msgs = []
-    for i, msg in enumerate(raw_msgs):
-        msg_time = last_updated - ((len(raw_msgs) - 1 - i) * 1000)
-        frontend_msgs.append({
-            "role": "agent",
-            "content": str(msg),
-            "timestamp": msg_time
-        })
+    # Messages are spaced one second apart, the last one at last_updated
+    first_time = last_updated - (len(raw_msgs) - 1) * 1000
+    frontend_msgs = [
+        {"role": "agent", "content": _message_text(msg), "timestamp": msg_time}
+        for msg, msg_time in zip(raw_msgs, range(first_time, last_updated + 1, 1000))
+    ]
 
     # Note: JIT RENDERING FIX block for render_tikz_to_svg has been removed.
     composite_model = state.get("composite_model")
@@ -207,14 +332,17 @@ def serialize_state(state: AgentState, next_nodes: tuple, file_stats: os.stat_re
     }
 
 # --- Endpoints ---
+# Handlers that only do blocking work (LLM refinement, checkpoint updates, project files) are
+# plain `def` so FastAPI runs them in its threadpool; graph runs stay async and push their
+# checkpoint reads/writes and file I/O off the event loop.
 
 @app.get("/api/library")
-async def get_library():
+def get_library():
     try:
         DATA_PATH = config.get("paths", "data_dir", "data")
         # which is the root for the execution context.
-        with open(f"{DATA_PATH}/library_registry.json", 'r') as f:
-            return json.load(f)
+        with open(f"{DATA_PATH}/library_registry.json", 'rb') as f:
+            return fast_json.loads(f.read())
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Library registry file not found.")
     except Exception as e:
@@ -237,9 +365,9 @@ async def start_workflow(req: StartRequest):
     }
     
     try:
-        graph.invoke(initial_input, config=config)
-        snapshot = graph.get_state(config)
-        save_project(req.username, thread_id, snapshot.values)
+        await graph.ainvoke(initial_input, config=config)
+        snapshot = await graph.aget_state(config)
+        await asyncio.to_thread(save_project, req.username, thread_id, snapshot.values)
         return { "thread_id": thread_id, "state": serialize_state(snapshot.values, snapshot.next) }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -247,28 +375,28 @@ async def start_workflow(req: StartRequest):
 @app.post("/api/resume")
 async def resume_workflow(req: ResumeRequest):
     config = get_config(req.thread_id)
-    snapshot = graph.get_state(config)
+    snapshot = await graph.aget_state(config)
     
     # Restore state from disk if memory is empty
     if not snapshot.values:
-        saved_state = load_project(req.username, req.thread_id)
-        if saved_state: graph.update_state(config, saved_state)
+        saved_state = await asyncio.to_thread(load_project, req.username, req.thread_id)
+        if saved_state: await graph.aupdate_state(config, saved_state)
         else: raise HTTPException(status_code=404, detail="Thread not found")
 
     # Inject API key from request into state memory (ephemeral)
     if req.api_key:
-        graph.update_state(config, {"api_key": req.api_key})
+        await graph.aupdate_state(config, {"api_key": req.api_key})
 
     try:
-        graph.invoke(None, config=config)
-        snapshot = graph.get_state(config)
-        save_project(req.username, req.thread_id, snapshot.values)
+        await graph.ainvoke(None, config=config)
+        snapshot = await graph.aget_state(config)
+        await asyncio.to_thread(save_project, req.username, req.thread_id, snapshot.values)
         return { "thread_id": req.thread_id, "state": serialize_state(snapshot.values, snapshot.next) }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/update_state")
-async def update_state_part(req: UpdateStateRequest):
+def update_state_part(req: UpdateStateRequest):
     config = get_config(req.thread_id)
     key_map = {
         "spec": "spec", 
@@ -279,6 +407,8 @@ async def update_state_part(req: UpdateStateRequest):
         "curator_output": "curator_output"
     }
     if req.key not in key_map: raise HTTPException(status_code=400, detail="Invalid key")
+    # Polling no longer restores memory, so a partial update must not replace an unloaded project
+    restore_if_empty(config, req.username, req.thread_id)
     try:
         graph.update_state(config, {key_map[req.key]: req.value})
         snapshot = graph.get_state(config)
@@ -288,7 +418,7 @@ async def update_state_part(req: UpdateStateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/refine")
-async def refine_plan(req: RefineRequest):
+def refine_plan(req: RefineRequest):
     """
     Triggers the prompt refinement logic based on the user's updated Spec/Matrix.
     Resets the workflow to the state after planning, ready for retrieval.
@@ -296,6 +426,7 @@ async def refine_plan(req: RefineRequest):
     config = get_config(req.thread_id)
     saved_state = load_project(req.username, req.thread_id)
     if not saved_state: raise HTTPException(status_code=404, detail="Thread not found")
+    restore_if_empty(config, req.username, req.thread_id)
     
     # 1. Initialize Agent with API Key (use request key or stored key)
     api_key = req.api_key or saved_state.get("api_key")
@@ -346,13 +477,9 @@ async def refine_plan(req: RefineRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/rename")
-async def rename_project(req: RenameRequest):
+def rename_project(req: RenameRequest):
     config = get_config(req.thread_id)
-    snapshot = graph.get_state(config)
-    if not snapshot.values:
-        saved_state = load_project(req.username, req.thread_id)
-        if saved_state: graph.update_state(config, saved_state)
-        else: raise HTTPException(status_code=404, detail="Thread not found")
+    restore_if_empty(config, req.username, req.thread_id)
     try:
         graph.update_state(config, {"project_name": req.new_name})
         snapshot = graph.get_state(config)
@@ -362,52 +489,147 @@ async def rename_project(req: RenameRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/delete")
-async def delete_project(req: DeleteRequest):
+def delete_project(req: DeleteRequest):
     success = delete_project_file(req.username, req.thread_id)
     if success: return {"status": "success", "thread_id": req.thread_id}
     else: raise HTTPException(status_code=404, detail="Project not found")
 
+# Last poll body per thread, reused while the state's ETag is unchanged: {thread_id: (etag, body)}
+_POLL_CACHE: Dict[str, tuple] = {}
+_POLL_CACHE_SIZE = 256
+_POLL_CACHE_LOCK = threading.Lock()
+
+def _checkpoint_version(snapshot) -> Optional[tuple]:
+    """(checkpoint_id, created_at in ms) of a snapshot. Every state update writes a new checkpoint."""
+    checkpoint_id = (snapshot.config or {}).get("configurable", {}).get("checkpoint_id")
+    if not checkpoint_id or not snapshot.created_at: return None
+    created_ms = int(datetime.datetime.fromisoformat(snapshot.created_at).timestamp() * 1000)
+    return checkpoint_id, created_ms
+
+def _poll_response(request: Request, thread_id: str, etag: str, build) -> Response:
+    headers = {"ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    with _POLL_CACHE_LOCK:
+        cached = _POLL_CACHE.get(thread_id)
+    if cached is not None and cached[0] == etag:
+        body = cached[1]
+    else:
+        body = fast_json.dumps({"thread_id": thread_id, "state": build()}, default=_json_default)
+        with _POLL_CACHE_LOCK:
+            _POLL_CACHE.pop(thread_id, None)
+            if len(_POLL_CACHE) >= _POLL_CACHE_SIZE:
+                del _POLL_CACHE[next(iter(_POLL_CACHE))]
+            _POLL_CACHE[thread_id] = (etag, body)
+    # Already-encoded bytes: skips both the payload dict and the JSON encode on an unchanged state
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/poll/{username}/{thread_id}")
-async def poll_state(username: str, thread_id: str):
+async def poll_state(username: str, thread_id: str, request: Request):
     config = get_config(thread_id)
-    snapshot = graph.get_state(config)
+    snapshot = await graph.aget_state(config)
     
-    # Check if memory is empty (server restart case)
+    # Memory is empty (server restart case): answer from the saved file without writing a checkpoint.
+    # Handlers that modify the thread restore it first.
     if not snapshot.values:
-        saved_state = load_project(username, thread_id)
-        if saved_state:
-            # Restore state to memory so serialization can check next_nodes if needed
-            # NOTE: update_state creates a new checkpoint, effectively 'resuming' the memory
-            graph.update_state(config, saved_state)
-            snapshot = graph.get_state(config)
-        else:
-            raise HTTPException(status_code=404, detail="Thread not found")
+        stats = await asyncio.to_thread(_stat_project, username, thread_id)
+        if stats is None: raise HTTPException(status_code=404, detail="Thread not found")
+        try: saved_state = await asyncio.to_thread(_load_project_cached, username, thread_id, stats.st_mtime_ns)
+        except Exception: raise HTTPException(status_code=404, detail="Thread not found")
+        # Every save rewrites the file, so its mtime identifies the content
+        return _poll_response(request, thread_id, f'"f{stats.st_mtime_ns:x}"',
+                              lambda: serialize_state(saved_state, (), file_stats=stats))
     
-    return {"thread_id": thread_id, "state": serialize_state(snapshot.values, snapshot.next)}
+    values, next_nodes = snapshot.values, snapshot.next
+    version = _checkpoint_version(snapshot)
+    if version is None:
+        return FastJSONResponse({"thread_id": thread_id, "state": serialize_state(values, next_nodes)})
+    # The checkpoint id identifies the state; lastUpdated is its creation time, so cached bytes stay accurate
+    checkpoint_id, created_ms = version
+    return _poll_response(request, thread_id, f'"c{checkpoint_id}"',
+                          lambda: serialize_state(values, next_nodes, last_updated_ms=created_ms))
+
+# Per-user listing cache: {"version": ..., "projects": {thread_id: {"mtime_ns": ..., "entry": <listing entry>}}}.
+# Entries are reused while the project file's mtime is unchanged, so a listing reads one small file.
+PROJECT_INDEX = "index.json"
+_INDEX_VERSION = 2
+_INDEX_LOCK = threading.Lock()
+
+# The dashboard card fields. Opening a project loads its full state through /api/poll.
+LISTING_STATE_KEYS = ("project_name", "project_notes", "user_request", "currentNode", "status", "lastUpdated")
+
+def _listing_entry(username: str, thread_id: str, stats: os.stat_result) -> Dict[str, Any]:
+    data = _load_project_cached(username, thread_id, stats.st_mtime_ns)
+    # infer state using empty tuple for next_nodes since we are offline
+    full_state = _serialize_state(data, (), file_stats=stats)
+    summary = {k: full_state[k] for k in LISTING_STATE_KEYS}
+    summary["messages"] = []
+    return {
+        "id": thread_id,
+        "name": data.get("project_name", data.get("user_request", "Untitled")[:30]),
+        "notes": data.get("project_notes", ""),
+        "created_at": datetime.datetime.fromtimestamp(stats.st_ctime).isoformat(),
+        "state": summary
+    }
+
+def _scan_projects(user_dir: Path):
+    """Reads the listing index and stats every project file in one pass."""
+    try: stored = fast_json.loads((user_dir / PROJECT_INDEX).read_bytes())
+    except Exception: stored = {}
+    # Older indexes held full project states; they are simply rebuilt
+    index = stored.get("projects", {}) if stored.get("version") == _INDEX_VERSION else {}
+    stats = {}
+    with os.scandir(user_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json") or entry.name == PROJECT_INDEX: continue
+            try: stats[entry.name[:-len(".json")]] = entry.stat()
+            except OSError: pass
+    return index, stats
+
+def _write_index(username: str, user_dir: Path, current: Dict):
+    try:
+        with _INDEX_LOCK:
+            data = fast_json.dumps({"version": _INDEX_VERSION, "projects": current}, default=_json_default)
+            _atomic_write(user_dir / PROJECT_INDEX, data)
+    except Exception as e:
+        print(f"ERROR:    Failed to write project index for {username}: {e}")
 
 @app.get("/api/projects/{username}")
 async def list_projects(username: str):
     user_dir = get_user_dir(username)
-    projects = []
-    for f in user_dir.glob("*.json"):
-        try:
-            stats = f.stat()
-            with open(f, 'r') as file:
-                data = json.load(file)
-                created_ts = stats.st_ctime
-                name = data.get("project_name", data.get("user_request", "Untitled")[:30])
-                notes = data.get("project_notes", "") 
-                # infer state using empty tuple for next_nodes since we are offline
-                projects.append({
-                    "id": f.stem,
-                    "name": name,
-                    "notes": notes, 
-                    "created_at": datetime.datetime.fromtimestamp(created_ts).isoformat(),
-                    "state": serialize_state(data, (), file_stats=stats) 
-                })
-        except: pass
+    index, all_stats = await asyncio.to_thread(_scan_projects, user_dir)
+
+    current = {}
+    stale = []
+    for thread_id, stats in all_stats.items():
+        cached = index.get(thread_id)
+        if cached and cached.get("mtime_ns") == stats.st_mtime_ns: current[thread_id] = cached
+        else: stale.append((thread_id, stats))
+
+    # Only new/changed projects are read; a cold directory parses its files concurrently
+    entries = await asyncio.gather(
+        *(asyncio.to_thread(_listing_entry, username, thread_id, stats) for thread_id, stats in stale),
+        return_exceptions=True,
+    )
+    for (thread_id, stats), entry in zip(stale, entries):
+        if isinstance(entry, Exception): continue
+        current[thread_id] = {"mtime_ns": stats.st_mtime_ns, "entry": entry}
+
+    # Rewrite only when a project was added, changed or deleted
+    if current.keys() != index.keys() or any(current[k] is not index[k] for k in current):
+        await asyncio.to_thread(_write_index, username, user_dir, current)
+
+    projects = [item["entry"] for item in current.values()]
     projects.sort(key=lambda x: x["state"]["lastUpdated"], reverse=True)
-    return projects
+    return FastJSONResponse(projects)
 
 if __name__ == "__main__":
-    uvicorn.run("server:app", host="0.0.0.0", port=8997, reload=True)
\ No newline at end of file
+    # uvloop/httptools come with uvicorn[standard]; fall back to the pure-Python loop/parser without them
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    reload = config.get("server", "reload", True)
+    uvicorn.run(
+        "server:app", host="0.0.0.0", port=8997, loop=loop, http=http, reload=reload,
+        # uvicorn ignores workers when reloading
+        workers=None if reload else config.get("server", "workers", 1),
+    )
\ No newline at end of file
@@ -100,7 +100,8 @@ export default function App() {
           // Only update local state if we are switching to a new project
           // Note: We deliberately update even if names match to ensure 'currentNode' inference from list_projects is applied
           if (state.project_name !== proj.name || state.lastUpdated !== proj.state.lastUpdated) { 
-             setState(proj.state);
+             // The listing carries only a summary; startPolling fetches the full state right away
+             setState({ ...EMPTY_STATE, ...proj.state });
              setWorkspaceNotes(proj.state.project_notes);
           }
       }
@@ -122,7 +123,7 @@ export default function App() {
 
   const startPolling = (threadId: string) => {
     stopPolling();
-    pollInterval.current = window.setInterval(async () => {
+    const poll = async () => {
       try {
         const data = await api.pollState(session!.username, threadId);
         
@@ -146,7 +147,9 @@ export default function App() {
       } catch (e) {
         console.error("Polling error:", e);
       }
-    }, 1500);
+    };
+    pollInterval.current = window.setInterval(poll, 1500);
+    poll();
   };
 
   const handleLogin = (e: React.FormEvent) => {
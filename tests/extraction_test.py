@@ -2,6 +2,10 @@ import re
 import json
 import os
 
+_BLOCK_RE = re.compile(r"```\w*(.*?)```", re.DOTALL)
+# Anchored to the start of a line so http:// URLs inside strings survive
+_COMMENT_RE = re.compile(r"^\s*//.*$", re.MULTILINE)
+
 def extract_json(text: str) -> dict:
     """
     Robust extraction logic to find the LAST valid JSON block in the text.
@@ -28,16 +32,16 @@ def extract_json(text: str) -> dict:
         pass
 
     # 1. Regex Match for Markdown Code Blocks
-    matches = re.findall(r"```\w*(.*?)```", text, re.DOTALL)
-    print(f"Found {len(matches)} markdown code blocks.")
+    # Only the block spans are kept; each block is sliced when it is tried
+    spans = [m.span(1) for m in _BLOCK_RE.finditer(text)]
+    print(f"Found {len(spans)} markdown code blocks.")
     
     # Iterate REVERSE to find the last valid JSON block
-    for i, match in enumerate(reversed(matches)):
-        print(f"\nChecking Block #{len(matches) - i} (Reverse index {i})...")
+    for i, (start, end) in enumerate(reversed(spans)):
+        print(f"\nChecking Block #{len(spans) - i} (Reverse index {i})...")
         
         # Clean up potential comments in JSON (e.g. // comments)
-        # Note: We anchor to start of line to avoid stripping http:// URLs inside strings
-        clean_text = re.sub(r"^\s*//.*$", "", match, flags=re.MULTILINE)
+        clean_text = _COMMENT_RE.sub("", text[start:end])
         
         try:
             data = json.loads(clean_text.strip())
@@ -67,9 +71,10 @@ def extract_json(text: str) -> dict:
     if s != -1 and e != -1:
         print(f"Found potential JSON braces at {s}:{e}")
         candidate = text[s:e]
-        clean_text = re.sub(r"^\s*//.*$", "", candidate, flags=re.MULTILINE)
         try: 
-            return json.loads(clean_text.strip())
+            # Comment lines can only make the parse fail, so strip them only on failure
+            try: return json.loads(candidate)
+            except json.JSONDecodeError: return json.loads(_COMMENT_RE.sub("", candidate))
         except Exception as e:
             print(f"Fallback parse failed: {e}")
             
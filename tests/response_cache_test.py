@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "backend"))
+
+from llm_cache import ResponseCache
+
+def _open(directory: str, max_entries: int = 100) -> ResponseCache:
+    return ResponseCache(os.path.join(directory, "cache.blob"), os.path.join(directory, "cache.idx"), max_entries)
+
+def _entry(i: int) -> dict:
+    return {"response": f"answer {i}", "thoughts": None}
+
+def test_put_get_and_reopen():
+    with tempfile.TemporaryDirectory() as d:
+        cache = _open(d)
+        cache.put("a", _entry(1))
+        assert cache.get("a") == _entry(1)  # served from memory before the flush
+        cache.flush()
+        assert cache.get("a") == _entry(1)
+        assert cache.get("missing") is None
+
+        reopened = _open(d)
+        assert reopened.get("a") == _entry(1)
+        assert len(reopened) == 1
+
+def test_compaction_keeps_live_entries():
+    with tempfile.TemporaryDirectory() as d:
+        cache = _open(d, max_entries=3)
+        for i in range(10):
+            cache.put_many([(f"k{i}", _entry(i))])
+        # LRU cap: only the three most recent survive, and compaction dropped the dead records
+        assert [cache.get(f"k{i}") for i in range(7)] == [None] * 7
+        assert [cache.get(f"k{i}") for i in range(7, 10)] == [_entry(i) for i in range(7, 10)]
+        assert cache._index_lines <= 6
+
+        reopened = _open(d, max_entries=3)
+        assert reopened.get("k9") == _entry(9)
+
+def test_compaction_by_another_process():
+    with tempfile.TemporaryDirectory() as d:
+        writer, reader = _open(d, max_entries=3), _open(d, max_entries=3)
+        writer.put_many([("old", _entry(0))])
+        reader.put_many([("shared", _entry(1))])
+        assert reader.get("shared") == _entry(1)
+
+        # Pushes the writer past its compaction threshold; the reader's offsets are now stale
+        for i in range(10):
+            writer.put_many([(f"k{i}", _entry(i))])
+        assert reader.get("k9") == _entry(9)
+        assert reader.get("shared") is None  # evicted by the writer's compaction, not misread
+
+        reader.put_many([("after", _entry(42))])
+        assert _open(d, max_entries=3).get("after") == _entry(42)
+
+def test_corrupt_record_is_a_miss():
+    with tempfile.TemporaryDirectory() as d:
+        cache = _open(d)
+        cache.put_many([("good", _entry(1)), ("bad", _entry(2))])
+        offset, length = cache._index["bad"]
+        with open(cache.blob_path, "r+b") as f:
+            f.seek(offset)
+            f.write(b"\xff" * length)
+
+        reopened = _open(d)
+        assert reopened.get("bad") is None
+        assert "bad" not in reopened  # dropped from the index
+        assert reopened.get("good") == _entry(1)
+
+def main():
+    tests = [test_put_get_and_reopen, test_compaction_keeps_live_entries,
+             test_compaction_by_another_process, test_corrupt_record_is_a_miss]
+    for test in tests:
+        test()
+        print(f"[PASS] {test.__name__}")
+
+if __name__ == "__main__":
+    main()